@@ -0,0 +1 @@
+# Benchmarks for the storefront; run them with `python -m bench.<name>`
@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from store.ledger import invoice_rows, render_invoice  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join('bench', 'results', 'invoice.json')
+LINE_COUNTS = [1, 5, 10]
+
+
+def sample_order(lines):
+    return {
+        'order_id': '01HZY3Q0K7M3V6Q2W8X9T1R4BC',
+        'date': '2024-06-01 12:00:00',
+        'customer_name': 'Ayesha Khan',
+        'customer_phone': '0300-1234567',
+        'customer_address': 'House 12, Street 4, Lahore',
+        'items': [
+            {'id': i, 'name': f'T-Shirt {i}', 'size': 'M', 'quantity': 1 + i % 3, 'price': 1500}
+            for i in range(lines)
+        ],
+        'total_amount': sum(1500 * (1 + i % 3) for i in range(lines)),
+    }
+
+
+def render_pandas(order):
+    # The previous path: DataFrame construction plus pandas' generic openpyxl writer
+    import pandas as pd
+
+    buffer = BytesIO()
+    pd.DataFrame(invoice_rows(order)).to_excel(buffer, index=False, engine='openpyxl')
+    return buffer.getvalue()
+
+
+RENDERERS = {'pandas': render_pandas, 'write_only': render_invoice}
+
+
+def measure(render, order, iterations):
+    render(order)  # warm imports and caches
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        render(order)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Peak traced allocations for one render, separately so tracing doesn't skew the timings
+    tracemalloc.start()
+    render(order)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p50_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'peak_kib': round(peak / 1024, 1),
+        'size_bytes': len(render(order)),
+    }
+
+
+def run_invoice(iterations):
+    cases = {}
+    for lines in LINE_COUNTS:
+        order = sample_order(lines)
+        cases[str(lines)] = {name: measure(render, order, iterations) for name, render in RENDERERS.items()}
+    return {
+        'benchmark': 'invoice',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'iterations': iterations,
+        'cases': cases,
+    }
+
+
+def print_report(result):
+    print(f"{result['iterations']} render(s) per case")
+    print(f"  {'lines':>5} {'renderer':<11} {'p50 ms':>8} {'mean ms':>8} {'peak KiB':>9} {'bytes':>7}")
+    for lines, renderers in result['cases'].items():
+        for name, stats in renderers.items():
+            print(f"  {lines:>5} {name:<11} {stats['p50_ms']:>8.2f} {stats['mean_ms']:>8.2f} "
+                  f"{stats['peak_kib']:>9.1f} {stats['size_bytes']:>7}")
+        old, new = renderers['pandas'], renderers['write_only']
+        if new['p50_ms'] and new['peak_kib']:
+            print(f"  {'':>5} {'speedup':<11} {old['p50_ms'] / new['p50_ms']:>7.1f}x "
+                  f"{'':>8} {old['peak_kib'] / new['peak_kib']:>8.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-invoice render time and peak memory, pandas vs write-only openpyxl")
+    parser.add_argument('--iterations', type=int, default=50, help="timed renders per case")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    result = run_invoice(args.iterations)
+    print_report(result)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import argparse
+import ast
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ['main.py', 'pages/products.py', 'pages/cart.py', 'pages/order.py', 'pages/admin.py']
+HEAVY_MODULES = ['pandas', 'numpy', 'openpyxl', 'pyarrow', 'PIL']
+DEFAULT_OUTPUT = os.path.join('bench', 'results', 'startup.json')
+
+
+def page_imports(page):
+    # The page's top-level import statements, i.e. what a cold first visit pays for
+    with open(os.path.join(ROOT, page), 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=page)
+    return '\n'.join(
+        ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def import_time(code):
+    # Run `code` in a fresh interpreter under -X importtime
+    probe = f"{code}\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', probe],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+
+    total_us = 0
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        cumulative_us = int(cumulative_us)
+        if not name.startswith('  '):
+            total_us += cumulative_us
+            modules.append((name.strip(), cumulative_us))
+
+    heavy = [name for name in result.stdout.strip().split(',') if name]
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return total_us, heavy, modules
+
+
+def run_startup(repeat=3):
+    baseline = min(import_time('import streamlit')[0] for _ in range(repeat))
+    pages = {}
+    for page in PAGES:
+        samples = [import_time(page_imports(page)) for _ in range(repeat)]
+        total_us, heavy, modules = min(samples, key=lambda sample: sample[0])
+        pages[page] = {
+            'import_ms': round(total_us / 1000, 2),
+            'over_streamlit_ms': round((total_us - baseline) / 1000, 2),
+            'heavy_modules': heavy,
+            'top_imports': [{'module': name, 'ms': round(us / 1000, 2)} for name, us in modules[:5]],
+        }
+    return {
+        'benchmark': 'startup',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'repeat': repeat,
+        'streamlit_import_ms': round(baseline / 1000, 2),
+        'pages': pages,
+    }
+
+
+def print_report(result, baseline=None):
+    print(f"import streamlit: {result['streamlit_import_ms']:.1f} ms (best of {result['repeat']})")
+    print(f"  {'page':<20} {'imports':>9} {'+extra':>9}  heavy modules")
+    for page, stats in result['pages'].items():
+        line = (f"  {page:<20} {stats['import_ms']:>9.1f} {stats['over_streamlit_ms']:>9.1f}  "
+                f"{', '.join(stats['heavy_modules']) or '-'}")
+        before = (baseline or {}).get('pages', {}).get(page)
+        if before:
+            line += f"  (was {before['over_streamlit_ms']:.1f} ms extra)"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start import cost of every page (-X importtime)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per page; the fastest is kept")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    parser.add_argument('--compare', help="previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    result = run_startup(args.repeat)
+    print_report(result, baseline)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
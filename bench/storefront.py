@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import multiprocessing
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STEPS = ['browse', 'add_to_cart', 'show_cart', 'place_order']
+DEFAULT_OUTPUT = os.path.join('bench', 'results', 'storefront.json')
+
+
+def make_workspace():
+    # Run against a scratch copy so benchmark orders never touch the real data
+    workspace = tempfile.mkdtemp(prefix='storefront_bench_')
+    for name in ('main.py', 'pages', 'store', 'assets'):
+        source = os.path.join(ROOT, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(workspace, name),
+                            ignore=shutil.ignore_patterns('__pycache__'))
+        else:
+            shutil.copy(source, workspace)
+    shutil.copytree(os.path.join(ROOT, 'data', 'images'), os.path.join(workspace, 'data', 'images'),
+                    ignore=shutil.ignore_patterns('thumbs'))
+    # Stock every size deeply so checkouts still go through the inventory but never sell out
+    with open(os.path.join(ROOT, 'data', 'products.json'), 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+    for product in catalog['products']:
+        product['stock'] = 10 ** 9
+    with open(os.path.join(workspace, 'data', 'products.json'), 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, indent=4)
+    return workspace
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        'count': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p90_ms': round(percentile(samples, 90) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3),
+    }
+
+
+class Session:
+    # One simulated shopper driving the real pages through AppTest
+
+    def __init__(self, workspace, product_ids, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.products = AppTest.from_file(os.path.join(workspace, 'pages', 'products.py'), default_timeout=timeout)
+        self.cart = AppTest.from_file(os.path.join(workspace, 'pages', 'cart.py'), default_timeout=timeout)
+        self.product_ids = product_ids
+        self.timings = {step: [] for step in STEPS}
+        self.errors = []
+
+    def _timed(self, step, action):
+        start = time.perf_counter()
+        action()
+        self.timings[step].append(time.perf_counter() - start)
+
+    def _check(self, app, step):
+        if app.exception:
+            raise RuntimeError(f"{step}: {app.exception[0].message}")
+
+    def checkout(self, iteration):
+        product_id = self.product_ids[iteration % len(self.product_ids)]
+
+        self._timed('browse', self.products.run)
+        self._check(self.products, 'browse')
+
+        self._timed('add_to_cart', self.products.button(key=f"add_{product_id}").click().run)
+        self._check(self.products, 'add_to_cart')
+
+        # Hand the session's cart over to the cart page, as switch_page would
+        for key in ('cart', 'cart_id', 'cart_synced_version'):
+            if key in self.products.session_state:
+                self.cart.session_state[key] = self.products.session_state[key]
+
+        self._timed('show_cart', self.cart.run)
+        self._check(self.cart, 'show_cart')
+
+        self.cart.text_input(key='customer_name_input').input(f"Bench Shopper {iteration}")
+        self.cart.text_input(key='customer_phone_input').input('+92 300 0000000')
+        self.cart.text_area(key='customer_address_input').input('Benchmark Street')
+        self._timed('place_order', self.cart.button(key='place_order_button').click().run)
+        self._check(self.cart, 'place_order')
+        if 'last_order' not in self.cart.session_state:
+            raise RuntimeError("place_order: no order was placed")
+
+        # The cart was cleared at checkout
+        self.products.session_state['cart'] = self.cart.session_state['cart']
+        self.products.session_state['cart_synced_version'] = self.cart.session_state['cart_synced_version']
+
+
+def run_session(workspace, product_ids, iterations, warmup, timeout, start_barrier, results):
+    # AppTest drives a process-global runtime, so every session gets its own process
+    os.chdir(workspace)
+    sys.path.insert(0, workspace)
+    session = Session(workspace, product_ids, timeout)
+
+    # Unmeasured rounds pay for imports, thumbnails and the first catalog load
+    for iteration in range(warmup):
+        session.checkout(iteration)
+    session.timings = {step: [] for step in STEPS}
+
+    start_barrier.wait()
+    start = time.time()
+    completed = 0
+    for iteration in range(iterations):
+        try:
+            session.checkout(iteration)
+            completed += 1
+        except Exception as e:
+            session.errors.append(str(e))
+    results.put({
+        'start': start,
+        'end': time.time(),
+        'completed': completed,
+        'timings': session.timings,
+        'errors': session.errors,
+    })
+
+
+def run_benchmark(sessions=4, iterations=10, warmup=1, timeout=30):
+    workspace = make_workspace()
+    try:
+        with open(os.path.join(workspace, 'data', 'products.json'), 'r', encoding='utf-8') as f:
+            product_ids = [product['id'] for product in json.load(f)['products']]
+
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(sessions)
+        queue = context.Queue()
+        workers = [
+            context.Process(target=run_session,
+                            args=(workspace, product_ids, iterations, warmup, timeout, barrier, queue))
+            for _ in range(sessions)
+        ]
+        for worker in workers:
+            worker.start()
+        results = [queue.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    elapsed = max(result['end'] for result in results) - min(result['start'] for result in results)
+    timings = {step: [t for result in results for t in result['timings'][step]] for step in STEPS}
+    completed = sum(result['completed'] for result in results)
+    errors = [error for result in results for error in result['errors']]
+    return {
+        'benchmark': 'storefront',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'streamlit': __import__('streamlit').__version__,
+        'sessions': sessions,
+        'iterations': iterations,
+        'warmup': warmup,
+        'elapsed_s': round(elapsed, 3),
+        'checkouts': completed,
+        'checkouts_per_s': round(completed / elapsed, 3) if elapsed else 0.0,
+        'errors': errors[:20],
+        'error_count': len(errors),
+        'steps': {step: summarize(samples) for step, samples in timings.items() if samples},
+    }
+
+
+def compare(result, baseline):
+    lines = []
+    for step, stats in result['steps'].items():
+        before = baseline.get('steps', {}).get(step)
+        if before:
+            change = (stats['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+            lines.append(f"  {step:<12} p50 {before['p50_ms']:>9.1f} -> {stats['p50_ms']:>9.1f} ms ({change:+.1f}%)")
+    before = baseline.get('checkouts_per_s')
+    if before:
+        change = (result['checkouts_per_s'] - before) / before * 100
+        lines.append(f"  throughput   {before:>9.2f} -> {result['checkouts_per_s']:>9.2f} checkouts/s ({change:+.1f}%)")
+    return '\n'.join(lines)
+
+
+def print_report(result):
+    print(f"{result['sessions']} session(s) x {result['iterations']} checkout(s) "
+          f"in {result['elapsed_s']:.2f}s -> {result['checkouts_per_s']:.2f} checkouts/s")
+    print(f"  {'step':<12} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}  (ms)")
+    for step, stats in result['steps'].items():
+        print(f"  {step:<12} {stats['p50_ms']:>9.1f} {stats['p90_ms']:>9.1f} "
+              f"{stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    if result['error_count']:
+        print(f"  {result['error_count']} error(s), first: {result['errors'][0]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive browse -> add_to_cart -> show_cart -> place_order headlessly")
+    parser.add_argument('--sessions', type=int, default=4, help="concurrent simulated sessions")
+    parser.add_argument('--iterations', type=int, default=10, help="checkouts per session")
+    parser.add_argument('--warmup', type=int, default=1, help="unmeasured checkouts per session")
+    parser.add_argument('--timeout', type=float, default=30, help="per script run timeout (s)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    parser.add_argument('--compare', help="previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.sessions, args.iterations, args.warmup, args.timeout)
+    print_report(result)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print(f"Compared with {args.compare}:")
+            print(compare(result, json.load(f)))
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0 if not result['error_count'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,10 @@
 import streamlit as st
-import json
-import pandas as pd
-from datetime import datetime
-from io import BytesIO
+from store.catalog import load_catalog
+from store.session import sync_cart
+from store.theme import apply_theme
 
-# Initialize session state
-if 'cart' not in st.session_state:
-    st.session_state.cart = []
+# Initialize session state (cart shared through the state backend)
+sync_cart()
 
 # Configure page
 st.set_page_config(
@@ -15,101 +13,8 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Add custom CSS
-st.markdown("""
-    <style>
-    /* Main container styling */
-    .main {
-        background: linear-gradient(135deg, #f5f7fa 0%, #e3eeff 100%);
-        padding: 2rem;
-    }
-    
-    /* Hero section */
-    .hero-section {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 3rem 2rem;
-        border-radius: 20px;
-        text-align: center;
-        margin-bottom: 2rem;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.2);
-    }
-    
-    .hero-title {
-        font-size: 3.5rem;
-        font-weight: bold;
-        margin-bottom: 1rem;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-    }
-    
-    .hero-subtitle {
-        font-size: 1.5rem;
-        opacity: 0.9;
-        margin-bottom: 2rem;
-    }
-    
-    /* Feature cards */
-    .feature-card {
-        background: white;
-        padding: 2rem;
-        border-radius: 15px;
-        text-align: center;
-        transition: transform 0.3s ease;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.1);
-        height: 100%;
-    }
-    
-    .feature-card:hover {
-        transform: translateY(-5px);
-    }
-    
-    .feature-icon {
-        font-size: 2.5rem;
-        margin-bottom: 1rem;
-    }
-    
-    .feature-title {
-        font-size: 1.5rem;
-        color: #2c3e50;
-        margin-bottom: 1rem;
-        font-weight: bold;
-    }
-    
-    .feature-description {
-        color: #666;
-        font-size: 1.1rem;
-        line-height: 1.6;
-    }
-    
-    /* CTA button */
-    .cta-button {
-        background: linear-gradient(135deg, #ff6b6b 0%, #ee5253 100%);
-        color: white;
-        padding: 1rem 2rem;
-        border-radius: 50px;
-        font-size: 1.2rem;
-        font-weight: bold;
-        text-decoration: none;
-        display: inline-block;
-        transition: transform 0.3s ease;
-        box-shadow: 0 4px 15px rgba(238, 82, 83, 0.3);
-    }
-    
-    .cta-button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 20px rgba(238, 82, 83, 0.4);
-    }
-    
-    @media (max-width: 768px) {
-        .hero-title {
-            font-size: 2.5rem;
-        }
-        .hero-subtitle {
-            font-size: 1.2rem;
-        }
-    }
-    </style>
-""", unsafe_allow_html=True)
+# Add custom CSS (minified once per process, cached by the browser across reruns)
+apply_theme('main')
 
 # Hero Section with button instead of link
 st.markdown("""
@@ -204,9 +109,8 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-# Load products
-with open('data/products.json', 'r', encoding='utf-8') as f:
-    products_data = json.load(f)
+# Load products (warms the shared catalog cache for the products page)
+catalog = load_catalog()
 
 st.title("🛍️ Welcome - T-Shirt Store")
 
@@ -221,55 +125,10 @@ st.write("""
 st.markdown("---")
 st.write("👈 Please select 'Products' page from the sidebar to view our products")
 
-def create_order_excel(order_details):
-    # Create DataFrame for order
-    df = pd.DataFrame({
-        'Order ID': [order_details['order_id']],
-        'Customer Name': [order_details['name']],
-        'Email': [order_details['email']],
-        'Phone': [order_details['phone']],
-        'Products': [', '.join(order_details['products'])],
-        'Total Amount': [order_details['total']],
-        'Order Date': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
-    })
-    
-    # Create BytesIO object to store Excel file
-    buffer = BytesIO()
-    
-    # Save DataFrame to Excel in memory
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False)
-    
-    # Get the Excel data
-    excel_data = buffer.getvalue()
-    
-    return excel_data, f"order_{order_details['order_id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-
 # Add this where you handle order submission
 if st.button("Place Order"):
     if st.session_state.cart:
-        # Collect order details
-        order_details = {
-            'order_id': f"ORD{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            'name': st.session_state.get('customer_name', ''),
-            'email': st.session_state.get('customer_email', ''),
-            'phone': st.session_state.get('customer_phone', ''),
-            'products': [item['name'] for item in st.session_state.cart],
-            'total': sum(item['price'] * item.get('quantity', 1) for item in st.session_state.cart)
-        }
-        
-        # Create Excel file in memory
-        excel_data, file_name = create_order_excel(order_details)
-        
-        # Provide download button
-        st.download_button(
-            label="📥 Download Order Details",
-            data=excel_data,
-            file_name=file_name,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        
-        st.success("✅ Order placed successfully!")
-        st.session_state.cart = []  # Clear cart after order
+        # Name, phone and address are collected (and required) on the cart page
+        st.switch_page("pages/cart.py")
     else:
-        st.warning("Your cart is empty!") 
\ No newline at end of file
+        st.warning("Your cart is empty!")
@@ -0,0 +1,131 @@
+import streamlit as st
+from store.analytics import data_version, get_aggregates
+from store.cache import cache_stats
+from store.exports import FORMATS, build_export
+from store.history import ingest
+from store.metrics import arm_profiler, last_profile, page_run, snapshot, write_prometheus
+
+def show_dashboard():
+    st.title("📊 Sales Dashboard")
+    
+    # Pick up any new order files (unchanged files are skipped by the manifest)
+    try:
+        ingest()
+    except Exception as e:
+        st.warning(f"Could not refresh order history: {str(e)}")
+    
+    # Computed once per data version and shared by every admin session
+    with st.spinner("Crunching sales data..."):
+        stats = get_aggregates(data_version())
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Revenue", f"Rs. {stats['revenue']:,.0f}")
+    with col2:
+        st.metric("Orders", f"{stats['orders']:,}")
+    with col3:
+        st.metric("Average Order Value", f"Rs. {stats['average_order_value']:,.0f}")
+    
+    if not stats['orders']:
+        st.info("No orders yet.")
+        return
+    
+    st.markdown("### 📈 Revenue by Day")
+    st.line_chart(stats['revenue_by_day'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("### 🏆 Top Products")
+        st.dataframe(stats['top_products'], use_container_width=True)
+    with col2:
+        st.markdown("### 📏 Size Mix")
+        st.bar_chart(stats['size_mix'])
+
+def show_export():
+    st.markdown("---")
+    st.markdown("### 📦 Export All Orders")
+    export_format = st.selectbox("Export format", list(FORMATS), key="export_format")
+    
+    # Ledger orders plus the legacy order files; only built (or taken from
+    # the cache) when requested
+    if st.button("📦 Prepare All Orders Export", key="prepare_export_button"):
+        try:
+            export_path = build_export(export_format)
+            with open(export_path, 'rb') as file:
+                st.download_button(
+                    label="📥 Download All Orders",
+                    data=file,
+                    file_name=f"all_orders.{export_format}",
+                    mime=FORMATS[export_format],
+                )
+        except Exception as e:
+            st.error(f"Error exporting orders: {str(e)}")
+
+def show_performance():
+    st.markdown("---")
+    st.markdown("### ⏱️ Performance (this server process)")
+    
+    rows = snapshot()
+    if rows:
+        st.dataframe(
+            [
+                {
+                    'Timer': row['name'] + ''.join(f" [{value}]" for value in row['labels'].values()),
+                    'Count': row['count'],
+                    'Mean (ms)': round(row['mean_ms'], 2),
+                    'p50 (ms)': round(row['p50_ms'], 2),
+                    'p95 (ms)': round(row['p95_ms'], 2),
+                    'Max (ms)': round(row['max_ms'], 2),
+                }
+                for row in rows
+            ],
+            use_container_width=True
+        )
+    else:
+        st.info("No timings recorded yet.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("💾 Write Prometheus metrics file", key="write_metrics_button"):
+            st.success(f"Metrics written to {write_prometheus()}")
+    with col2:
+        if st.button("🔬 Profile next page run", key="arm_profiler_button"):
+            arm_profiler()
+            st.info("The next page run in this process will be captured with cProfile.")
+    
+    show_caches()
+    
+    profile = last_profile()
+    if profile:
+        with st.expander(f"Last profile: {profile['page']} ({profile['path']})"):
+            st.code(profile['report'])
+
+def show_caches():
+    st.markdown("### 🗄️ Shared caches (this server process)")
+    rows = cache_stats()
+    if not rows:
+        st.info("No caches in use yet.")
+        return
+    
+    st.dataframe(
+        [
+            {
+                'Cache': row['name'],
+                'Entries': row['entries'],
+                'Size (MB)': round(row['bytes'] / 1024 / 1024, 2),
+                'Limit (MB)': round(row['max_bytes'] / 1024 / 1024, 1),
+                'Hits': row['hits'],
+                'Misses': row['misses'],
+                'Hit rate': f"{row['hit_rate']:.0%}",
+                'Evictions': row['evictions'],
+                'Expired': row['expirations'],
+            }
+            for row in rows
+        ],
+        use_container_width=True
+    )
+
+with page_run('admin'):
+    show_dashboard()
+show_export()
+show_performance()
@@ -1,49 +1,21 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime
 import os
-import uuid
+from store.bulk import price_bulk_order, read_bulk_csv
+from store.catalog import get_product, load_catalog
+from store.checkout import checkout, new_order
+from store.ids import new_order_id
+from store.metrics import page_run
+from store.session import checkout_key, clear_cart, sync_cart
 
-# Initialize session state for cart
-if 'cart' not in st.session_state:
-    st.session_state.cart = []
+# Initialize session state for cart (shared through the state backend)
+sync_cart()
 
 # Create necessary directories
 os.makedirs('orders', exist_ok=True)
 os.makedirs('data/images', exist_ok=True)
 
-def save_to_excel(order_data):
-    # Create DataFrame for order
-    order_items = []
-    for item in order_data['items']:
-        order_items.append({
-            'Order Date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'Customer Name': order_data['customer_details']['name'],
-            'Phone': order_data['customer_details']['phone'],
-            'Address': order_data['customer_details']['address'],
-            'Product': item['name'],
-            'Size': item['size'],
-            'Quantity': item.get('quantity', 1),
-            'Price': item['price'],
-            'Total': item['price'] * item.get('quantity', 1)
-        })
-    
-    df = pd.DataFrame(order_items)
-    
-    # Create 'orders' directory if it doesn't exist
-    if not os.path.exists('orders'):
-        os.makedirs('orders')
-    
-    # Save to Excel
-    file_path = f"orders/orders_{datetime.now().strftime('%Y%m%d')}.xlsx"
-    
-    if os.path.exists(file_path):
-        # If file exists, read it and append new data
-        existing_df = pd.read_excel(file_path)
-        df = pd.concat([existing_df, df], ignore_index=True)
-    
-    df.to_excel(file_path, index=False)
-    return file_path
+# Carts with more lines than this are shown as one table instead of a widget row per line
+SUMMARY_LINE_THRESHOLD = 25
 
 def place_order():
     if not st.session_state.cart:
@@ -56,10 +28,6 @@ def place_order():
     customer_phone = st.text_input("Phone Number", key="customer_phone_input")
     customer_address = st.text_area("Delivery Address", key="customer_address_input")
     
-    # Calculate total before placing order
-    total_amount = sum(item['price'] * item.get('quantity', 1) for item in st.session_state.cart)
-    st.markdown(f"### Total Amount: Rs. {total_amount}")
-    
     # Add Place Order button with unique key
     if st.button("Place Order", type="primary", key="place_order_button"):
         if not all([customer_name, customer_phone, customer_address]):
@@ -67,54 +35,17 @@ def place_order():
             return False
             
         try:
-            # Generate unique order ID and timestamp
-            order_id = str(uuid.uuid4())[:8]
-            current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Create order data
-            excel_data = []
-            for item in st.session_state.cart:
-                excel_data.append({
-                    'Order ID': order_id,
-                    'Date': current_date,
-                    'Customer Name': customer_name,
-                    'Phone Number': customer_phone,
-                    'Delivery Address': customer_address,
-                    'Product Name': item['name'],
-                    'Size': item.get('size', 'N/A'),
-                    'Quantity': item.get('quantity', 1),
-                    'Price': item['price'],
-                    'Subtotal': item['price'] * item.get('quantity', 1),
-                    'Total Amount': total_amount
-                })
-            
-            # Create DataFrame
-            df_order = pd.DataFrame(excel_data)
-            
-            # Create filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"order_{timestamp}_{order_id}.xlsx"
-            filepath = os.path.join('orders', filename)
-            
-            # Save to Excel
-            df_order.to_excel(filepath, index=False, engine='openpyxl')
-            
-            # Show success message
-            st.success(f"Order #{order_id} placed successfully!")
+            # Generate a sortable, collision-free order ID and create order data
+            order_id = new_order_id()
+            order = new_order(order_id, customer_name, customer_phone, customer_address, st.session_state.cart,
+                              idempotency_key=checkout_key(customer_name, customer_phone, customer_address))
             
-            # Add download button
-            with open(filepath, 'rb') as file:
-                excel_bytes = file.read()
-                st.download_button(
-                    label=f"📥 Download Invoice #{order_id}",
-                    data=excel_bytes,
-                    file_name=filename,
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    key="download_invoice_button"
-                )
+            # Persist the order; the invoice is rendered in the background
+            st.session_state.last_order = checkout(order)
             
-            # Clear cart
-            st.session_state.cart = []
+            # Clear cart and show the confirmation page
+            clear_cart()
+            st.switch_page("pages/order.py")
             
             return True
             
@@ -124,63 +55,116 @@ def place_order():
     
     return False
 
-def show_cart():
-    st.title("🛒 Your Shopping Cart")
+def load_bulk_order():
+    uploaded = st.session_state.get('bulk_order_file')
+    if uploaded is None:
+        st.session_state.bulk_message = ('warning', "Choose a CSV file first.", [])
+        return
     
-    # Add Continue Shopping button
-    if st.button("← Continue Shopping", type="secondary", key="continue_shopping_button"):
-        st.switch_page("pages/products.py")
+    try:
+        # Validated and priced in one vectorized pass, then added with a single cart update
+        result = price_bulk_order(read_bulk_csv(uploaded), load_catalog())
+    except Exception as e:
+        st.session_state.bulk_message = ('error', f"Error reading bulk order: {str(e)}", [])
+        return
     
-    if not st.session_state.cart:
-        st.info("Your cart is empty. Start shopping!")
+    st.session_state.cart.add_many(result['lines'])
+    st.session_state.bulk_message = (
+        'success' if result['lines'] else 'warning',
+        f"Added {len(result['lines'])} line(s), {result['units']} item(s), Rs. {result['total']} to cart. "
+        f"{len(result['rejected'])} row(s) rejected.",
+        result['rejected'][:20]
+    )
+
+def show_bulk_upload():
+    with st.expander("📦 Bulk order (CSV upload)"):
+        st.caption("Columns: product id, size, quantity. Repeated product/size rows are merged.")
+        st.file_uploader("Order file", type=["csv"], key="bulk_order_file")
+        st.button("Add to Cart", key="bulk_order_button", on_click=load_bulk_order)
+    
+    message = st.session_state.pop('bulk_message', None)
+    if message:
+        level, text, rejected = message
+        getattr(st, level)(text)
+        if rejected:
+            st.dataframe({
+                'Line': [line for line, _ in rejected],
+                'Problem': [reason for _, reason in rejected],
+            }, hide_index=True)
+
+def show_cart_summary(cart):
+    # One read-only table for bulk carts; widgets per line don't scale to hundreds of rows
+    lines = list(cart)
+    st.markdown(f"**{len(lines)} lines, {cart.item_count} items**")
+    st.dataframe({
+        'Product': [line.name for line in lines],
+        'Size': [line.size for line in lines],
+        'Price': [line.price for line in lines],
+        'Quantity': [line.quantity for line in lines],
+        'Subtotal': [line.subtotal for line in lines],
+    }, hide_index=True, use_container_width=True)
+    st.button("🗑️ Clear Cart", key="clear_cart_button", on_click=cart.clear)
+
+# Quantity and remove clicks only rerun this fragment, not the whole page
+@st.fragment
+def show_cart_items():
+    cart = sync_cart()
+    if not cart:
+        # Last line removed: rerun the whole page to drop the order form
+        st.rerun()
+    
+    if len(cart) > SUMMARY_LINE_THRESHOLD:
+        show_cart_summary(cart)
+        st.markdown(f"### Total Amount: Rs. {cart.total}")
         return
     
-    # Display cart items
-    for i, item in enumerate(st.session_state.cart):
+    for line in cart:
         col1, col2, col3, col4, col5, col6 = st.columns([2, 1, 1, 1, 1, 1])
+        key = f"{line.id}_{line.size}"
+        
+        # Look up the current product details by id through the catalog index
+        product = get_product(line.id)
         
         with col1:
-            st.write(f"**{item['name']}**")
+            st.write(f"**{product['name'] if product else line.name}**")
         with col2:
-            st.write(f"Size: {item.get('size', 'N/A')}")
+            st.write(f"Size: {line.size}")
         with col3:
-            st.write(f"Rs. {item['price']}")
+            st.write(f"Rs. {line.price}")
         with col4:
-            if st.button("➕", key=f"plus_button_{i}"):
-                item['quantity'] = item.get('quantity', 1) + 1
-                st.rerun()
+            st.button("➕", key=f"plus_button_{key}", on_click=cart.increment, args=(line.key, 1))
             
-            st.write(f"{item.get('quantity', 1)}")
+            st.write(f"{line.quantity}")
             
-            if st.button("➖", key=f"minus_button_{i}"):
-                if item.get('quantity', 1) > 1:
-                    item['quantity'] = item.get('quantity', 1) - 1
-                    st.rerun()
+            st.button("➖", key=f"minus_button_{key}", disabled=line.quantity <= 1,
+                      on_click=cart.increment, args=(line.key, -1))
         with col5:
-            st.write(f"Rs. {item['price'] * item.get('quantity', 1)}")
+            st.write(f"Rs. {line.subtotal}")
         with col6:
-            if st.button("🗑️", key=f"remove_button_{i}"):
-                st.session_state.cart.pop(i)
-                st.rerun()
+            st.button("🗑️", key=f"remove_button_{key}", on_click=cart.remove, args=(line.key,))
+    
+    st.markdown(f"### Total Amount: Rs. {cart.total}")
+
+def show_cart():
+    st.title("🛒 Your Shopping Cart")
+    
+    # Add Continue Shopping button
+    if st.button("← Continue Shopping", type="secondary", key="continue_shopping_button"):
+        st.switch_page("pages/products.py")
+    
+    show_bulk_upload()
+    
+    if not st.session_state.cart:
+        st.info("Your cart is empty. Start shopping!")
+        return
+    
+    # Display cart items (quantity changes only rerun this fragment)
+    show_cart_items()
     
     # Show place order form
     st.markdown("---")
     place_order()
 
-# Add a section for downloading all orders (for admin)
-with st.sidebar:
-    st.markdown("---")
-    st.markdown("### 📊 Admin Section")
-    if os.path.exists('data/orders.xlsx'):
-        with open('data/orders.xlsx', 'rb') as file:
-            all_orders_data = file.read()
-        
-        st.download_button(
-            label="📥 Download All Orders",
-            data=all_orders_data,
-            file_name="all_orders.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-
 # Show cart when page loads
-show_cart() 
\ No newline at end of file
+with page_run('cart'):
+    show_cart() 
\ No newline at end of file
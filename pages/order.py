@@ -1,30 +1,37 @@
 import streamlit as st
-import pandas as pd
-import os
-from datetime import datetime
+from store.ids import check_view_token, order_view_token
+from store.invoices import find_order, invoice_data, invoice_status, submit_invoice
+from store.metrics import page_run
+from store.theme import apply_theme
 
 # Hide the default menu and footer
-st.markdown("""
-    <style>
-        #MainMenu {visibility: hidden;}
-        footer {visibility: hidden;}
-        header {visibility: hidden;}
-        .stDeployButton {display: none;}
-        .css-eh5xgm {visibility: hidden;}
-        .css-1dp5vir {visibility: hidden;}
-        .css-1d391kg {padding-top: 0;}
-    </style>
-""", unsafe_allow_html=True)
+apply_theme('order')
+
+def current_order_id():
+    # ?order=<id>&token=<t> survives reloads and worker switches; right after
+    # checkout the id comes from the session and is written into the URL
+    last_order_id = st.session_state.get('last_order', {}).get('order_id')
+    order_id = st.query_params.get('order')
+    if order_id is None and last_order_id is not None:
+        order_id = st.query_params['order'] = last_order_id
+        st.query_params['token'] = order_view_token(order_id)
+
+    # Customer details are only shown to the session that placed the order
+    # or to whoever has its confirmation link, not to anyone who guesses an id
+    if order_id is not None and order_id != last_order_id:
+        if not check_view_token(order_id, st.query_params.get('token')):
+            return None
+    return order_id
 
 def show_order_confirmation():
-    if 'last_order' not in st.session_state:
+    order_id = current_order_id()
+    order = find_order(order_id) if order_id else None
+    if order is None:
         st.error("No order found!")
         if st.button("← Return to Products"):
             st.switch_page("pages/products.py")
         return
     
-    order = st.session_state.last_order
-    
     # Show order confirmation
     st.title("🎉 Order Confirmed!")
     st.markdown(f"""
@@ -50,25 +57,39 @@ def show_order_confirmation():
     
     st.markdown(f"### Total Amount: Rs. {order['total_amount']}")
     
-    # Add download button for existing Excel file
-    try:
-        with open(order['excel_path'], 'rb') as file:
-            excel_bytes = file.read()
-            st.download_button(
-                label="📥 Download Invoice",
-                data=excel_bytes,
-                file_name=f"order_{order['order_id']}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                key="download_invoice_button"
-            )
-    except Exception as e:
-        st.error(f"Error loading invoice: {str(e)}")
+    # Add download button once the background invoice is ready
+    status = invoice_status(order['order_id'])
+    if status == 'missing':
+        # Submitted by another worker process (or before a restart): render it here
+        submit_invoice(order['order_id'])
+        status = 'pending'
+    if status == 'ready':
+        # Served from the in-memory invoice cache after the first view
+        st.download_button(
+            label="📥 Download Invoice",
+            data=invoice_data(order['order_id']),
+            file_name=f"order_{order['order_id']}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key="download_invoice_button"
+        )
+    elif status == 'pending':
+        st.info("⏳ Preparing your invoice...")
+        if st.button("🔄 Refresh", key="refresh_invoice_button"):
+            st.rerun()
+    else:
+        st.error("Error loading invoice: the invoice could not be generated.")
+        if st.button("🔁 Retry Invoice", key="retry_invoice_button"):
+            submit_invoice(order['order_id'])
+            st.rerun()
     
     # Continue shopping button
     if st.button("← Continue Shopping", type="primary"):
-        # Clear last order from session
-        del st.session_state.last_order
+        # Clear last order from session and the URL
+        st.session_state.pop('last_order', None)
+        st.query_params.pop('order', None)
+        st.query_params.pop('token', None)
         st.switch_page("pages/products.py")
 
 # Show order confirmation when page loads
-show_order_confirmation() 
\ No newline at end of file
+with page_run('order'):
+    show_order_confirmation() 
\ No newline at end of file
@@ -1,174 +1,91 @@
 import streamlit as st
-import json
 import os
+import math
+from store.catalog import load_catalog
+from store.inventory import availability, seed_from_catalog
+from store.metrics import page_run, timed
+from store.search import get_index
+from store.session import sync_cart
+from store.theme import apply_theme
+from store.thumbnails import GRID_WIDTH, thumbnail_data
 
-# Initialize session state if not already initialized
-if 'cart' not in st.session_state:
-    st.session_state.cart = []
+# Initialize session state if not already initialized (cart shared through the state backend)
+sync_cart()
+
+# Products per page for the grid
+PAGE_SIZE_OPTIONS = [6, 12, 24, 48]
+DEFAULT_PAGE_SIZE = 12
+
+if 'product_page' not in st.session_state:
+    st.session_state.product_page = 1
 
 def view_cart():
     st.switch_page("pages/cart.py")
 
-# Updated CSS with more colors and beautiful design
-st.markdown("""
-    <style>
-    /* Page background */
-    .main {
-        background: linear-gradient(135deg, #f5f7fa 0%, #e3eeff 100%);
-        padding: 1rem;
-    }
-    
-    /* Product card styling */
-    .product-card {
-        background: white;
-        border-radius: 15px;
-        padding: 1.5rem;
-        margin: 1rem 0;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-        transition: transform 0.3s ease, box-shadow 0.3s ease;
-        border: 1px solid #e1e8f0;
-    }
-    
-    .product-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 6px 20px rgba(0,0,0,0.15);
-    }
-    
-    /* Image styling */
-    .stImage {
-        max-width: 200px !important;
-        margin: 0 auto !important;
-        display: block !important;
-        border-radius: 10px;
-        padding: 10px;
-        background: #f8f9fa;
-    }
-    
-    .stImage > img {
-        max-height: 250px !important;
-        object-fit: contain !important;
-        transition: transform 0.3s ease;
-    }
-    
-    .stImage > img:hover {
-        transform: scale(1.05);
-    }
-    
-    /* Product details styling */
-    .product-details {
-        padding: 1rem 0;
-    }
-    
-    .product-title {
-        color: #2c3e50;
-        font-size: 1.5rem;
-        font-weight: 600;
-        margin-bottom: 0.5rem;
-    }
-    
-    .product-description {
-        color: #666;
-        font-size: 1rem;
-        line-height: 1.5;
-        margin-bottom: 1rem;
-    }
-    
-    .price-tag {
-        background: linear-gradient(135deg, #4CAF50 0%, #45a049 100%);
-        color: white;
-        padding: 0.5rem 1rem;
-        border-radius: 25px;
-        font-size: 1.1rem;
-        font-weight: bold;
-        display: inline-block;
-        margin: 0.5rem 0;
-    }
-    
-    /* Size selector styling */
-    .stSelectbox {
-        margin: 1rem 0;
-    }
-    
-    .stSelectbox > div > div {
-        background: #f8f9fa;
-        border-radius: 8px;
-        border: 2px solid #e9ecef;
-    }
-    
-    /* Button styling */
-    .stButton button {
-        background: linear-gradient(135deg, #3498db 0%, #2980b9 100%) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 25px !important;
-        padding: 0.5rem 2rem !important;
-        font-weight: 600 !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .stButton button:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 4px 15px rgba(52, 152, 219, 0.4) !important;
-    }
-    
-    /* Success message styling */
-    .stSuccess {
-        background: linear-gradient(135deg, #2ecc71 0%, #27ae60 100%) !important;
-        color: white !important;
-        border-radius: 10px !important;
-        padding: 1rem !important;
-        animation: slideIn 0.5s ease-out !important;
-    }
-    
-    @keyframes slideIn {
-        from {
-            transform: translateY(-10px);
-            opacity: 0;
-        }
-        to {
-            transform: translateY(0);
-            opacity: 1;
-        }
-    }
-    
-    /* Responsive design */
-    @media (max-width: 768px) {
-        .product-card {
-            padding: 1rem;
-        }
-        .stImage {
-            max-width: 150px !important;
-        }
-        .stImage > img {
-            max-height: 200px !important;
-        }
-        .product-title {
-            font-size: 1.2rem;
-        }
-    }
-    </style>
-""", unsafe_allow_html=True)
+def change_page(delta):
+    st.session_state.product_page += delta
+
+def reset_page():
+    st.session_state.product_page = 1
+
+def paginate(products, page_size):
+    # Only the current page's products are rendered on each rerun
+    page_count = max(1, math.ceil(len(products) / page_size))
+    page = min(max(st.session_state.product_page, 1), page_count)
+    st.session_state.product_page = page
+    start = (page - 1) * page_size
+    return products[start:start + page_size], page, page_count
+
+def show_page_controls(page, page_count, position):
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("← Previous", key=f"prev_page_{position}", disabled=page <= 1,
+                  on_click=change_page, args=(-1,))
+    with col2:
+        st.markdown(f"<p style='text-align: center;'>Page {page} of {page_count}</p>", unsafe_allow_html=True)
+    with col3:
+        st.button("Next →", key=f"next_page_{position}", disabled=page >= page_count,
+                  on_click=change_page, args=(1,))
+
+# Updated CSS with more colors and beautiful design (includes the cart summary styles)
+apply_theme('products')
+
+def search_products(catalog):
+    index = get_index(catalog)
+    
+    query = st.text_input("🔍 Search products", key="search_query", on_change=reset_page)
+    with st.expander("Filters"):
+        sizes = st.multiselect("Sizes", sorted(index.sizes), key="search_sizes", on_change=reset_page)
+        price_range = None
+        if index.min_price < index.max_price:
+            price_range = st.slider(
+                "Price range (Rs.)",
+                min_value=index.min_price,
+                max_value=index.max_price,
+                value=(index.min_price, index.max_price),
+                key="search_price",
+                on_change=reset_page
+            )
+    
+    filtered = price_range is not None and price_range != (index.min_price, index.max_price)
+    if not (query or sizes or filtered):
+        return catalog.products
+    
+    min_price, max_price = price_range if filtered else (None, None)
+    results = index.search(query, sizes=sizes, min_price=min_price, max_price=max_price)
+    st.caption(f"{len(results)} product(s) found")
+    return results
 
 def show_products():
     st.title("👕 Our Products")
+    last_added = st.session_state.pop('last_added', None)
     
     # Show cart summary in sidebar
     with st.sidebar:
         st.markdown("### 🛒 Cart Summary")
-        cart_count = len(st.session_state.cart)
-        total = sum(item['price'] * item.get('quantity', 1) for item in st.session_state.cart)
+        cart_count = st.session_state.cart.item_count
+        total = st.session_state.cart.total
         
-        st.markdown("""
-            <style>
-            .cart-summary {
-                background-color: #f0f2f6;
-                padding: 20px;
-                border-radius: 10px;
-                margin-bottom: 20px;
-            }
-            </style>
-            """, unsafe_allow_html=True)
-            
         st.markdown(f"""
             <div class="cart-summary">
                 <p>Items in Cart: {cart_count}</p>
@@ -179,20 +96,43 @@ def show_products():
         if cart_count > 0:
             if st.button("View Cart 🛒", type="primary"):
                 st.switch_page("pages/cart.py")
+        
+        page_size = st.selectbox(
+            "Products per page",
+            PAGE_SIZE_OPTIONS,
+            index=PAGE_SIZE_OPTIONS.index(DEFAULT_PAGE_SIZE),
+            key="page_size",
+            on_change=reset_page
+        )
     
     try:
-        # Load products data
-        with open('data/products.json', 'r', encoding='utf-8') as f:
-            products_data = json.load(f)
+        # Load products data (cached across sessions, reloaded when the file changes)
+        catalog = load_catalog()
+        seed_from_catalog(catalog)
             
-        # Display products in a grid
-        for product in products_data['products']:
+        # Search and filter through the prebuilt index
+        products = search_products(catalog)
+        if not products:
+            st.info("No products match your search.")
+            return
+        
+        # Display the current page of products in a grid
+        products, page, page_count = paginate(products, page_size)
+        if page_count > 1:
+            show_page_controls(page, page_count, "top")
+        
+        # Live stock for the visible products only (one query per rerun)
+        stock = availability(product['id'] for product in products)
+        
+        for product in products:
             col1, col2 = st.columns([1, 2])
             
             with col1:
                 image_path = product.get('image', '')
                 try:
-                    st.image(image_path)
+                    # Serve a pre-resized rendition (bytes from the shared cache) instead of the full-size image
+                    with timed('image_render'):
+                        st.image(thumbnail_data(image_path), width=GRID_WIDTH)
                 except Exception as e:
                     st.error(f"Error loading image: {image_path}")
                     st.error(str(e))
@@ -206,29 +146,37 @@ def show_products():
                 selected_size = st.selectbox(
                     "Select Size",
                     sizes,
-                    key=f"size_{product['name']}"
+                    key=f"size_{product['id']}"
                 )
                 
-                if st.button("Add to Cart", key=f"add_{product['name']}"):
-                    add_to_cart(product, selected_size)
-                    st.success(f"Added {product['name']} (Size: {selected_size}) to cart!")
-                    st.rerun()
+                # Untracked products have no stock entry and are always available
+                available = stock.get((product['id'], selected_size))
+                sold_out = available is not None and available <= 0
+                if sold_out:
+                    st.warning("Sold out in this size")
+                elif available is not None:
+                    st.caption(f"{available} left in stock")
+                
+                # Callback adds to the cart before the rerun, so no extra st.rerun() is needed
+                st.button("Add to Cart", key=f"add_{product['id']}", on_click=add_to_cart, args=(product,),
+                          disabled=sold_out)
+                if last_added and last_added[0] == product['id']:
+                    st.success(f"Added {product['name']} (Size: {last_added[1]}) to cart!")
+        
+        if page_count > 1:
+            show_page_controls(page, page_count, "bottom")
                     
     except Exception as e:
         st.error(f"Error loading products: {str(e)}")
 
-def add_to_cart(product, selected_size):
-    if 'cart' not in st.session_state:
-        st.session_state.cart = []
+def add_to_cart(product, selected_size=None):
+    if selected_size is None:
+        selected_size = st.session_state[f"size_{product['id']}"]
     
-    # Add product with size to cart
-    cart_item = {
-        'name': product['name'],
-        'price': product['price'],
-        'size': selected_size,  # Add size to cart item
-        'quantity': 1
-    }
-    st.session_state.cart.append(cart_item)
+    # Add product with size to cart (merges into an existing line for the same size)
+    st.session_state.cart.add(product, selected_size)
+    st.session_state.last_added = (product['id'], selected_size)
 
 if __name__ == "__main__":
-    show_products() 
\ No newline at end of file
+    with page_run('products'):
+        show_products() 
\ No newline at end of file
@@ -0,0 +1 @@
+# Shared building blocks for the Streamlit pages (catalog, orders, ...)
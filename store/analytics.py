@@ -0,0 +1,115 @@
+import pandas as pd
+
+from store.cache import shared_cache
+from store.history import history_version, load_history
+from store.ledger import LEDGER_PATH, connect, ledger_version
+
+LINE_COLUMNS = ['order_id', 'order_date', 'customer_name', 'product_name', 'size',
+                'quantity', 'subtotal', 'order_total']
+
+# Aggregates per data version, shared by every admin session
+_aggregates = shared_cache('analytics', max_bytes=32 * 1024 * 1024, ttl=60 * 60, max_entries=4)
+
+
+def data_version(ledger_path=LEDGER_PATH):
+    return (ledger_version(ledger_path), history_version())
+
+
+def _ledger_lines(ledger_path):
+    # Plain tuples and epoch seconds straight from SQLite keep this vectorizable
+    cursor = connect(ledger_path).cursor()
+    cursor.row_factory = None
+    cursor.execute(
+        "SELECT o.order_id, CAST(strftime('%s', o.created_at) AS INTEGER), o.customer_name, "
+        "i.product_name, i.size, i.quantity, i.quantity * i.price, o.total_amount "
+        "FROM order_items i JOIN orders o ON o.order_id = i.order_id"
+    )
+    df = pd.DataFrame.from_records(cursor.fetchall(), columns=LINE_COLUMNS)
+    df['order_date'] = pd.to_datetime(df['order_date'], unit='s')
+    return df
+
+
+def drop_ledger_duplicates(history, ledger_order_ids, first_ledger_date):
+    # History rows for orders the ledger already has, and daily rollup rows
+    # from the days the ledger covers
+    if not len(history):
+        return history
+    is_rollup = history['source'].str.contains('orders_', regex=False)
+    duplicate = history['order_id'].isin(ledger_order_ids) | (
+        is_rollup & (history['order_date'] >= pd.Timestamp(first_ledger_date).normalize())
+    )
+    return history[~duplicate]
+
+
+def load_order_lines(ledger_path=LEDGER_PATH):
+    # Ledger orders plus the legacy files from the Parquet history. History
+    # rows for orders the ledger already has are dropped, as are daily rollup
+    # rows from the days the ledger covers.
+    ledger = _ledger_lines(ledger_path)
+    history = load_history(columns=LINE_COLUMNS + ['source'])
+    if len(ledger):
+        history = drop_ledger_duplicates(history, ledger['order_id'], ledger['order_date'].min())
+
+    frames = [frame[LINE_COLUMNS] for frame in (history, ledger) if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=LINE_COLUMNS)
+
+    df = pd.concat(frames, ignore_index=True)
+    df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0).astype('int64')
+    df['subtotal'] = pd.to_numeric(df['subtotal'], errors='coerce').fillna(0.0)
+    df['order_date'] = pd.to_datetime(df['order_date'], errors='coerce')
+    df['size'] = df['size'].astype('object').fillna('N/A')
+
+    # Rollup rows have no order id; their timestamp and customer identify the order
+    missing = df['order_id'].isna()
+    df['order_key'] = df['order_id'].astype('object')
+    df.loc[missing, 'order_key'] = (
+        df.loc[missing, 'order_date'].astype(str) + '|' + df.loc[missing, 'customer_name'].astype(str)
+    )
+    return df.dropna(subset=['order_date'])
+
+
+def compute_aggregates(df):
+    if df.empty:
+        return {
+            'revenue': 0.0,
+            'orders': 0,
+            'average_order_value': 0.0,
+            'revenue_by_day': pd.Series(dtype='float64', name='Revenue'),
+            'top_products': pd.DataFrame(columns=['Quantity', 'Revenue']),
+            'size_mix': pd.Series(dtype='int64', name='Quantity'),
+        }
+
+    order_totals = df.groupby('order_key', sort=False)['subtotal'].sum()
+    revenue = float(order_totals.sum())
+
+    revenue_by_day = df.groupby(df['order_date'].dt.normalize())['subtotal'].sum().rename('Revenue')
+    revenue_by_day.index.name = 'Date'
+
+    top_products = (
+        df.groupby('product_name')
+        .agg(Quantity=('quantity', 'sum'), Revenue=('subtotal', 'sum'))
+        .sort_values('Revenue', ascending=False)
+        .head(10)
+    )
+    top_products.index.name = 'Product'
+
+    size_mix = df.groupby('size')['quantity'].sum().sort_values(ascending=False).rename('Quantity')
+    size_mix.index.name = 'Size'
+
+    return {
+        'revenue': revenue,
+        'orders': int(order_totals.size),
+        'average_order_value': revenue / order_totals.size,
+        'revenue_by_day': revenue_by_day,
+        'top_products': top_products,
+        'size_mix': size_mix,
+    }
+
+
+def get_aggregates(version=None, ledger_path=LEDGER_PATH):
+    # `version` changes whenever the ledger or history does, so a cached entry is never stale
+    version = data_version(ledger_path) if version is None else version
+    return _aggregates.get_or_set(
+        (ledger_path, version), lambda: compute_aggregates(load_order_lines(ledger_path))
+    )
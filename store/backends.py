@@ -0,0 +1,122 @@
+import json
+from abc import ABC, abstractmethod
+import os
+import sqlite3
+import threading
+import time
+
+from store import ledger
+from store.cache import shared_cache
+from store.cart import Cart
+
+# STORE_BACKEND=sqlite lets several `streamlit run main.py` workers on one
+# box share carts; the default keeps carts in this process only
+BACKEND_ENV = 'STORE_BACKEND'
+STATE_PATH_ENV = 'STORE_STATE_PATH'
+DEFAULT_STATE_PATH = 'data/state.db'
+
+CART_MAX_AGE = 30 * 24 * 60 * 60
+
+# In-process carts are evicted by age and, least recently used first, by size
+IN_PROCESS_CART_BYTES = 64 * 1024 * 1024
+
+
+class StateBackend(ABC):
+    # Orders always go to the SQLite ledger, which is already safe to share
+    # between processes (WAL mode, one transaction per order)
+
+    def __init__(self, ledger_path=ledger.LEDGER_PATH):
+        self.ledger_path = ledger_path
+
+    @abstractmethod
+    def load_cart(self, cart_id):
+        ...
+
+    @abstractmethod
+    def save_cart(self, cart_id, cart):
+        ...
+
+    @abstractmethod
+    def delete_cart(self, cart_id):
+        ...
+
+    def append_order(self, order):
+        return ledger.append_order(order, self.ledger_path)
+
+    def get_order(self, order_id):
+        return ledger.get_order(order_id, self.ledger_path)
+
+    def order_id_for_key(self, idempotency_key):
+        return ledger.order_id_for_key(idempotency_key, self.ledger_path)
+
+
+class InProcessBackend(StateBackend):
+    def __init__(self, ledger_path=ledger.LEDGER_PATH):
+        super().__init__(ledger_path)
+        self._carts = shared_cache('carts', max_bytes=IN_PROCESS_CART_BYTES, ttl=CART_MAX_AGE)
+
+    def load_cart(self, cart_id):
+        data = self._carts.get(cart_id)
+        return Cart.from_dict(data) if data is not None else None
+
+    def save_cart(self, cart_id, cart):
+        self._carts.put(cart_id, cart.to_dict())
+
+    def delete_cart(self, cart_id):
+        self._carts.pop(cart_id)
+
+
+class SQLiteBackend(StateBackend):
+    def __init__(self, path=DEFAULT_STATE_PATH, ledger_path=ledger.LEDGER_PATH):
+        super().__init__(ledger_path)
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            "DELETE FROM carts WHERE updated_at < ?", (time.time() - CART_MAX_AGE,)
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS carts ("
+                "cart_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+        return conn
+
+    def load_cart(self, cart_id):
+        row = self._connect().execute("SELECT data FROM carts WHERE cart_id = ?", (cart_id,)).fetchone()
+        return Cart.from_dict(json.loads(row[0])) if row is not None else None
+
+    def save_cart(self, cart_id, cart):
+        self._connect().execute(
+            "INSERT INTO carts VALUES (?, ?, ?) ON CONFLICT(cart_id) DO UPDATE "
+            "SET data = excluded.data, updated_at = excluded.updated_at",
+            (cart_id, json.dumps(cart.to_dict()), time.time()),
+        )
+
+    def delete_cart(self, cart_id):
+        self._connect().execute("DELETE FROM carts WHERE cart_id = ?", (cart_id,))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = os.environ.get(BACKEND_ENV, 'memory').lower()
+                if name == 'sqlite':
+                    _backend = SQLiteBackend(os.environ.get(STATE_PATH_ENV, DEFAULT_STATE_PATH))
+                elif name == 'memory':
+                    _backend = InProcessBackend()
+                else:
+                    raise ValueError(f"Unknown {BACKEND_ENV}: {name}")
+    return _backend
@@ -0,0 +1,125 @@
+import threading
+
+from store.metrics import timed
+
+# Wholesale CSVs come with a few different headers
+COLUMN_ALIASES = {
+    'id': 'id',
+    'product id': 'id',
+    'product_id': 'id',
+    'sku': 'id',
+    'size': 'size',
+    'quantity': 'quantity',
+    'qty': 'quantity',
+}
+
+DEFAULT_SIZES = ['S', 'M', 'L', 'XL']
+MAX_LINES = 10000
+# Per line; also keeps quantities (and totals) well inside int64
+MAX_QUANTITY = 100000
+
+# Catalog as NumPy arrays, rebuilt when the catalog version changes
+_arrays = {}
+_lock = threading.Lock()
+
+
+class CatalogArrays:
+    def __init__(self, catalog):
+        import numpy as np
+
+        products = sorted(catalog, key=lambda product: product['id'])
+        self.ids = np.array([product['id'] for product in products], dtype=np.int64)
+        self.prices = np.array([product['price'] for product in products], dtype=np.float64)
+        self.names = np.array([product['name'] for product in products], dtype=object)
+        self.sizes = np.array(sorted(
+            f"{product['id']}|{size}"
+            for product in products for size in product.get('sizes', DEFAULT_SIZES)
+        ))
+
+
+def catalog_arrays(catalog):
+    arrays = _arrays.get(catalog.version)
+    if arrays is None:
+        with _lock:
+            arrays = _arrays.get(catalog.version)
+            if arrays is None:
+                arrays = CatalogArrays(catalog)
+                _arrays.clear()
+                _arrays[catalog.version] = arrays
+    return arrays
+
+
+def read_bulk_csv(file):
+    # pandas/numpy are only imported when a bulk order is actually uploaded
+    import pandas as pd
+
+    df = pd.read_csv(file, dtype=str, keep_default_na=False, nrows=MAX_LINES + 1)
+    df = df.rename(columns=lambda name: COLUMN_ALIASES.get(name.strip().lower(), name))
+    missing = [column for column in ('id', 'size', 'quantity') if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    if len(df) > MAX_LINES:
+        raise ValueError(f"Bulk orders are limited to {MAX_LINES} lines")
+    return df
+
+
+@timed('bulk_price')
+def price_bulk_order(df, catalog):
+    # Validate and price every row in one vectorized pass. Returns the accepted
+    # lines as (id, name, price, size, quantity) tuples, duplicates merged, plus
+    # the rejected rows as (line number, reason)
+    import numpy as np
+    import pandas as pd
+
+    arrays = catalog_arrays(catalog)
+
+    ids = pd.to_numeric(df['id'].str.strip(), errors='coerce').to_numpy()
+    sizes = df['size'].str.strip().str.upper().to_numpy(dtype=str)
+    quantities = pd.to_numeric(df['quantity'].str.strip(), errors='coerce').to_numpy()
+
+    valid_id = ~np.isnan(ids) & (ids == np.floor(ids))
+    ids = np.where(valid_id, ids, -1).astype(np.int64)
+    positions = np.searchsorted(arrays.ids, ids)
+    positions = np.minimum(positions, max(len(arrays.ids) - 1, 0))
+    known = valid_id & (arrays.ids[positions] == ids) if len(arrays.ids) else np.zeros(len(ids), dtype=bool)
+
+    keys = np.char.add(np.char.add(ids.astype(str), '|'), sizes)
+    size_ok = np.isin(keys, arrays.sizes)
+    quantity_ok = (~np.isnan(quantities) & (quantities > 0) & (quantities <= MAX_QUANTITY)
+                   & (quantities == np.floor(quantities)))
+
+    reasons = np.select(
+        [~valid_id, ~known, ~size_ok, ~quantity_ok],
+        ['invalid product id', 'unknown product id', 'size not available', 'invalid quantity'],
+        default='',
+    )
+    accepted = reasons == ''
+    rejected = [(int(row) + 2, str(reasons[row])) for row in np.flatnonzero(~accepted)]
+
+    # Merge repeated (id, size) rows, keeping first-seen order
+    lines = pd.DataFrame({
+        'position': positions[accepted],
+        'size': sizes[accepted],
+        'quantity': quantities[accepted].astype(np.int64),
+    }).groupby(['position', 'size'], sort=False, as_index=False)['quantity'].sum()
+
+    position = lines['position'].to_numpy()
+    quantity = lines['quantity'].to_numpy()
+    prices = arrays.prices[position]
+    subtotals = prices * quantity
+
+    # Whole-rupee prices stay ints so totals display like the rest of the store
+    as_int = bool(np.all(prices == np.floor(prices)))
+    price_list = prices.astype(np.int64).tolist() if as_int else prices.tolist()
+    return {
+        'lines': list(zip(
+            arrays.ids[position].tolist(),
+            arrays.names[position].tolist(),
+            price_list,
+            lines['size'].tolist(),
+            quantity.tolist(),
+        )),
+        'units': int(quantity.sum()),
+        'total': int(subtotals.sum()) if as_int else float(subtotals.sum()),
+        'rejected': rejected,
+    }
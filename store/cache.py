@@ -0,0 +1,160 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Every cache is a process-wide singleton shared by all sessions, so memory
+# grows with the data, not with the number of connected users
+_caches = {}
+_registry_lock = threading.Lock()
+
+_MISSING = object()
+
+
+def sizeof(value):
+    # Approximate deep size in bytes. Shared objects are counted once; pandas
+    # and NumPy objects report their own buffers
+    seen = set()
+    total = 0
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        memory_usage = getattr(obj, 'memory_usage', None)
+        if callable(memory_usage) and not isinstance(obj, type):
+            usage = memory_usage(deep=True)
+            total += int(usage.sum() if hasattr(usage, 'sum') else usage)
+            continue
+        nbytes = getattr(obj, 'nbytes', None)
+        if isinstance(nbytes, int):
+            total += nbytes
+            continue
+
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif not isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+            if hasattr(obj, '__dict__'):
+                stack.append(vars(obj))
+            for slot in getattr(type(obj), '__slots__', ()):
+                attr = getattr(obj, slot, None)
+                if attr is not None:
+                    stack.append(attr)
+    return total
+
+
+class SharedCache:
+    # LRU cache bounded by total bytes (and optionally entry count), with an
+    # optional TTL and hit/miss/eviction counters
+
+    def __init__(self, name, max_bytes, ttl=None, max_entries=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key, default=None):
+        # Like get(), but without touching the LRU order or the counters
+        entry = self._entries.get(key)
+        if entry is None or (entry[2] is not None and entry[2] <= time.monotonic()):
+            return default
+        return entry[0]
+
+    def put(self, key, value, size=None):
+        size = sizeof(value) if size is None else size
+        if size > self.max_bytes:
+            # Would evict everything else; just don't cache it, and don't
+            # leave an older value for the key behind either
+            self.pop(key)
+            return value
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self.bytes += size
+            while self.bytes > self.max_bytes or (self.max_entries and len(self._entries) > self.max_entries):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    def get_or_set(self, key, factory, size=None):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.put(key, factory(), size)
+        return value
+
+    def pop(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+def shared_cache(name, max_bytes, ttl=None, max_entries=None):
+    # The same name always returns the same cache
+    cache = _caches.get(name)
+    if cache is None:
+        with _registry_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache = _caches[name] = SharedCache(name, max_bytes, ttl, max_entries)
+    return cache
+
+
+def cache_stats():
+    return [cache.stats() for _, cache in sorted(_caches.items())]
@@ -0,0 +1,124 @@
+import secrets
+
+
+class LineItem:
+    __slots__ = ('id', 'name', 'price', 'size', 'quantity')
+
+    def __init__(self, id, name, price, size, quantity=1):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.size = size
+        self.quantity = quantity
+
+    @property
+    def key(self):
+        return (self.id, self.size)
+
+    @property
+    def subtotal(self):
+        return self.price * self.quantity
+
+
+class Cart:
+    # Line items keyed by (product id, size); totals are kept up to date on
+    # every change so reading them never walks the cart
+    __slots__ = ('_lines', 'total', 'item_count', 'version', 'nonce')
+
+    def __init__(self):
+        self._lines = {}
+        self.total = 0
+        self.item_count = 0
+        # Bumped on every change so state backends know when to save
+        self.version = 0
+        # Identifies one checkout attempt; replaced when the cart is cleared
+        self.nonce = secrets.token_urlsafe(12)
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(list(self._lines.values()))
+
+    def __contains__(self, key):
+        return key in self._lines
+
+    def get(self, key):
+        return self._lines.get(key)
+
+    @property
+    def subtotal(self):
+        return self.total
+
+    def add(self, product, size, quantity=1):
+        # Re-adding the same product and size merges into the existing line
+        key = (product['id'], size)
+        line = self._lines.get(key)
+        if line is None:
+            line = self._lines[key] = LineItem(product['id'], product['name'], product['price'], size, 0)
+        line.quantity += quantity
+        self.total += line.price * quantity
+        self.item_count += quantity
+        self.version += 1
+        return line
+
+    def add_many(self, lines):
+        # Bulk load (id, name, price, size, quantity) lines with a single version bump
+        lines = list(lines)
+        for *_, quantity in lines:
+            if quantity <= 0:
+                raise ValueError(f"invalid quantity {quantity!r}")
+        for product_id, name, price, size, quantity in lines:
+            key = (product_id, size)
+            line = self._lines.get(key)
+            if line is None:
+                line = self._lines[key] = LineItem(product_id, name, price, size, 0)
+            line.quantity += quantity
+            self.total += line.price * quantity
+            self.item_count += quantity
+        self.version += 1
+
+    def set_quantity(self, key, quantity):
+        line = self._lines[key]
+        if quantity <= 0:
+            return self.remove(key)
+        delta = quantity - line.quantity
+        line.quantity = quantity
+        self.total += line.price * delta
+        self.item_count += delta
+        self.version += 1
+        return line
+
+    def increment(self, key, delta=1):
+        return self.set_quantity(key, self._lines[key].quantity + delta)
+
+    def remove(self, key):
+        line = self._lines.pop(key, None)
+        if line is not None:
+            self.total -= line.subtotal
+            self.item_count -= line.quantity
+            self.version += 1
+        return None
+
+    def clear(self):
+        self._lines.clear()
+        self.total = 0
+        self.item_count = 0
+        self.version += 1
+        self.nonce = secrets.token_urlsafe(12)
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'nonce': self.nonce,
+            'lines': [[line.id, line.name, line.price, line.size, line.quantity] for line in self._lines.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        cart = cls()
+        for product_id, name, price, size, quantity in data.get('lines', []):
+            cart.add({'id': product_id, 'name': name, 'price': price}, size, quantity)
+        cart.version = data.get('version', 0)
+        cart.nonce = data.get('nonce', cart.nonce)
+        return cart
@@ -0,0 +1,69 @@
+import json
+import os
+import threading
+
+from store.cache import shared_cache
+from store.metrics import timed
+
+CATALOG_PATH = 'data/products.json'
+
+# Process-wide cache shared by every Streamlit session, keyed by file path
+_cache = shared_cache('catalog', max_bytes=256 * 1024 * 1024, max_entries=4)
+_lock = threading.Lock()
+
+
+class Catalog:
+    def __init__(self, products, version):
+        self.products = products
+        self.version = version
+
+        # Build lookup indexes once per load
+        self.by_id = {}
+        self.by_name = {}
+        self.by_size = {}
+        for product in products:
+            self.by_id[product['id']] = product
+            self.by_name[product['name']] = product
+            for size in product.get('sizes', []):
+                self.by_size.setdefault(size, []).append(product['id'])
+
+    def __len__(self):
+        return len(self.products)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def get(self, product_id, default=None):
+        return self.by_id.get(product_id, default)
+
+    def with_size(self, size):
+        return [self.by_id[product_id] for product_id in self.by_size.get(size, [])]
+
+
+def _file_version(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_catalog(path=CATALOG_PATH):
+    # Only re-parse the JSON file when its mtime (or size) changed
+    version = _file_version(path)
+    cached = _cache.get(path)
+    if cached is not None and cached.version == version:
+        return cached
+
+    with _lock:
+        cached = _cache.peek(path)
+        if cached is not None and cached.version == version:
+            return cached
+
+        with timed('catalog_load'):
+            with open(path, 'r', encoding='utf-8') as f:
+                products_data = json.load(f)
+
+            catalog = Catalog(products_data.get('products', []), version)
+        return _cache.put(path, catalog)
+
+
+def get_product(product_id, path=CATALOG_PATH):
+    return load_catalog(path).get(product_id)
@@ -0,0 +1,144 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from store import intents, inventory
+from store.backends import get_backend
+from store.catalog import load_catalog
+from store.invoices import invoice_path, submit_invoice
+from store.metrics import timed
+from store.rollup import append_order_rows, start_compactor
+
+logger = logging.getLogger(__name__)
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def intent_log():
+    # This process's intent log, created by the first checkout. Creating it
+    # first finishes whatever checkouts a crashed worker left behind; nothing
+    # happens at import, so tools that only import the pages leave no logs.
+    # The background rollup compactor is started at the same point
+    global _log
+    if _log is None or _log.pid != os.getpid():
+        with _log_lock:
+            if _log is None or _log.pid != os.getpid():
+                intents.recover(_replay)
+                _log = intents.IntentLog.create()
+                start_compactor()
+    return _log
+
+
+def _replay(record):
+    # The "begin" record was on disk, so the order was accepted: make sure it
+    # reaches the ledger, unless its idempotency key was used by a retry since
+    order = record['order']
+    backend = get_backend()
+    if backend.get_order(order['order_id']) is None:
+        try:
+            backend.append_order(order)
+        except sqlite3.IntegrityError:
+            if record.get('reservation_id'):
+                inventory.release(record['reservation_id'])
+            return 'discarded'
+    if record.get('reservation_id'):
+        inventory.commit(record['reservation_id'])
+    # Derived files: at worst a crash right after this leaves one duplicate rollup row
+    append_order_rows(order)
+    submit_invoice(order['order_id'])
+    return 'replayed'
+
+
+CUSTOMER_FIELDS = ('customer_name', 'customer_phone', 'customer_address')
+
+
+def existing_order(order):
+    # The order already placed under this order's idempotency key. Never
+    # handed back to a request with different customer details
+    order_id = get_backend().order_id_for_key(order['idempotency_key'])
+    if order_id is None:
+        return None
+    existing = get_backend().get_order(order_id)
+    if any(str(existing[field]) != str(order[field]) for field in CUSTOMER_FIELDS):
+        raise ValueError("this checkout was already used for another order, please try again")
+    existing['excel_path'] = invoice_path(order_id)
+    return existing
+
+
+@timed('checkout')
+def checkout(order):
+    # Retrying with the same idempotency key (double click, reload after a
+    # crash, another worker) returns the order that was already placed
+    key = order.get('idempotency_key')
+    if key:
+        existing = existing_order(order)
+        if existing is not None:
+            return existing
+
+    # Stock is held before the order is written and released if that fails;
+    # raises inventory.OutOfStock when any line can no longer be filled
+    inventory.seed_from_catalog(load_catalog())
+    reservation_id = inventory.reserve(order['items'])
+
+    log = intent_log()
+    try:
+        # Durable before anything else is written, so recovery can finish the order
+        log.begin(order, reservation_id)
+    except BaseException:
+        inventory.release(reservation_id)
+        raise
+
+    try:
+        # The order is confirmed once it is in the ledger; the invoice follows in the background
+        get_backend().append_order(order)
+    except BaseException as e:
+        inventory.release(reservation_id)
+        log.finish(order['order_id'], 'abort')
+        # Lost a race with the same key on another session or worker
+        if key and isinstance(e, sqlite3.IntegrityError):
+            existing = existing_order(order)
+            if existing is not None:
+                return existing
+        raise
+
+    # The order is placed: from here on failures are logged, not reported to
+    # the shopper as a failed checkout (a hold that can't be committed expires
+    # without reducing stock, so that log line needs a manual set_stock)
+    try:
+        inventory.commit(reservation_id)
+    except Exception:
+        logger.exception("Could not commit stock for order %s", order['order_id'])
+    try:
+        append_order_rows(order)
+    except Exception:
+        logger.exception("Could not add order %s to the daily rollup", order['order_id'])
+    finally:
+        log.finish(order['order_id'])
+    order['excel_path'] = submit_invoice(order['order_id'])
+    return order
+
+
+def new_order(order_id, customer_name, customer_phone, customer_address, cart, idempotency_key=None):
+    return {
+        'order_id': order_id,
+        'idempotency_key': idempotency_key,
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'customer_name': customer_name,
+        'customer_phone': customer_phone,
+        'customer_address': customer_address,
+        'items': [
+            {
+                'id': line.id,
+                'name': line.name,
+                'size': line.size,
+                'quantity': line.quantity,
+                'price': line.price
+            }
+            for line in cart
+        ],
+        'total_amount': cart.total
+    }
+
@@ -0,0 +1,128 @@
+import csv
+import glob
+import os
+
+from store.history import history_version
+from store.ledger import LEDGER_PATH, ORDER_COLUMNS, XLSX_MIME, connect, iter_order_rows, ledger_version
+from store.metrics import timed
+
+EXPORT_DIR = 'data/exports'
+
+FORMATS = {
+    'xlsx': XLSX_MIME,
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def _write_csv(path, chunks):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(ORDER_COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+
+
+def _write_xlsx(path, chunks):
+    from openpyxl import Workbook
+
+    # Write-only mode streams rows to disk instead of keeping every cell in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(ORDER_COLUMNS)
+    for rows in chunks:
+        for row in rows:
+            sheet.append(row)
+    workbook.save(path)
+
+
+def _write_parquet(path, chunks):
+    # pyarrow (also used by the order history) is only imported when used
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('Order ID', pa.string()),
+        ('Date', pa.string()),
+        ('Customer Name', pa.string()),
+        ('Phone Number', pa.string()),
+        ('Delivery Address', pa.string()),
+        ('Product Name', pa.string()),
+        ('Size', pa.string()),
+        ('Quantity', pa.int64()),
+        ('Price', pa.float64()),
+        ('Subtotal', pa.float64()),
+        ('Total Amount', pa.float64()),
+    ])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            ))
+
+
+_WRITERS = {'xlsx': _write_xlsx, 'csv': _write_csv, 'parquet': _write_parquet}
+
+
+def _legacy_rows(ledger_path, chunk_size=10000):
+    # Orders that only exist in the legacy files (data/orders.xlsx, the old
+    # per-order workbooks and daily rollups), from the ingested Parquet history
+    from store.analytics import drop_ledger_duplicates
+    from store.history import load_history
+
+    history = load_history()
+    conn = connect(ledger_path)
+    first_ledger_date = conn.execute("SELECT min(created_at) FROM orders").fetchone()[0]
+    if first_ledger_date is not None:
+        ledger_order_ids = [row[0] for row in conn.execute("SELECT order_id FROM orders")]
+        history = drop_ledger_duplicates(history, ledger_order_ids, first_ledger_date)
+    if not len(history):
+        return
+
+    history = history.sort_values('order_date', kind='stable')
+    history['order_date'] = history['order_date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    columns = history[[
+        'order_id', 'order_date', 'customer_name', 'customer_phone', 'customer_address',
+        'product_name', 'size', 'quantity', 'price', 'subtotal', 'order_total',
+    ]].astype(object)
+    columns = columns.where(columns.notna(), None)
+    for start in range(0, len(columns), chunk_size):
+        yield list(columns.iloc[start:start + chunk_size].itertuples(index=False, name=None))
+
+
+def _all_rows(version, ledger_path):
+    # Legacy orders first (they are older), then the ledger
+    yield from _legacy_rows(ledger_path)
+    yield from iter_order_rows(version, path=ledger_path)
+
+
+def export_path(fmt, version, export_dir=EXPORT_DIR):
+    return os.path.join(export_dir, f"all_orders_{version}.{fmt}")
+
+
+@timed('admin_export')
+def build_export(fmt='xlsx', export_dir=EXPORT_DIR, ledger_path=LEDGER_PATH):
+    # Reuse the cached export while neither the ledger nor the history has changed
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    version = ledger_version(ledger_path)
+    path = export_path(fmt, f"{version}_{history_version()}", export_dir)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(export_dir, exist_ok=True)
+    tmp_path = os.path.join(export_dir, f".{os.getpid()}_{os.path.basename(path)}")
+    _WRITERS[fmt](tmp_path, _all_rows(version, ledger_path))
+    os.replace(tmp_path, path)
+
+    # Drop exports of older versions
+    for old_path in glob.glob(os.path.join(export_dir, f"all_orders_*.{fmt}")):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+    return path
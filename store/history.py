@@ -0,0 +1,190 @@
+import glob
+import json
+import os
+import re
+import sys
+
+import pandas as pd
+
+from store.locks import file_lock
+from store.metrics import timed
+
+HISTORY_DIR = 'data/history'
+MANIFEST_NAME = '_manifest.json'
+
+# Legacy per-order workbooks, compacted daily rollups and the legacy
+# consolidated workbook. Orders in the ledger are read from the ledger, so the
+# current day's rollup .csv and the invoices (order_<ULID>.xlsx, in the same
+# directory) are left out; ingesting them re-read a file for every new order
+SOURCE_PATTERNS = ['orders/order_*.xlsx', 'orders/orders_*.xlsx', 'data/orders.xlsx']
+
+# order_<8 hex>.xlsx and order_<YYYYmmdd_HHMMSS>_<8 hex>.xlsx
+LEGACY_ORDER_NAME = re.compile(r'order_(\d{8}_\d{6}_)?[0-9a-f]{8}\.xlsx')
+
+# place_order() and save_to_excel() wrote different headers over time
+COLUMN_ALIASES = {
+    'Order ID': 'order_id',
+    'Date': 'order_date',
+    'Order Date': 'order_date',
+    'Customer Name': 'customer_name',
+    'Phone Number': 'customer_phone',
+    'Phone': 'customer_phone',
+    'Delivery Address': 'customer_address',
+    'Address': 'customer_address',
+    'Product Name': 'product_name',
+    'Product': 'product_name',
+    'Size': 'size',
+    'Quantity': 'quantity',
+    'Price': 'price',
+    'Subtotal': 'subtotal',
+    'Total': 'subtotal',
+    'Total Amount': 'order_total',
+}
+
+COLUMNS = [
+    'order_id', 'order_date', 'customer_name', 'customer_phone', 'customer_address',
+    'product_name', 'size', 'quantity', 'price', 'subtotal', 'order_total', 'source'
+]
+
+
+# Source headers of text columns, read as str so phone numbers keep their leading zero
+TEXT_HEADERS = [
+    header for header, column in COLUMN_ALIASES.items()
+    if column in ('order_id', 'customer_name', 'customer_phone', 'customer_address', 'product_name', 'size')
+]
+
+
+def _read_source(path):
+    dtype = {header: str for header in TEXT_HEADERS}
+    if path.endswith('.csv'):
+        return pd.read_csv(path, dtype=dtype)
+    return pd.read_excel(path, engine='openpyxl', dtype=dtype)
+
+
+def normalize(df, source):
+    df = df.rename(columns=COLUMN_ALIASES)
+    for column in COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    df = df[COLUMNS].copy()
+
+    df['source'] = source
+    df['order_id'] = df['order_id'].map(lambda value: None if pd.isna(value) else str(value))
+    df['order_date'] = pd.to_datetime(df['order_date'], errors='coerce')
+    df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(1).astype('int64')
+    for column in ('price', 'subtotal', 'order_total'):
+        df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+    df['subtotal'] = df['subtotal'].fillna(df['price'] * df['quantity'])
+    for column in ('order_id', 'customer_name', 'customer_phone', 'customer_address', 'product_name', 'size'):
+        df[column] = df[column].astype('string')
+    return df.dropna(subset=['order_date'])
+
+
+def _load_manifest(history_dir):
+    try:
+        with open(os.path.join(history_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_manifest(history_dir, manifest):
+    path = os.path.join(history_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _remove_parts(parts):
+    for part in parts:
+        try:
+            os.remove(part)
+        except FileNotFoundError:
+            pass
+
+
+def _part_name(source):
+    # orders/order_abc.xlsx -> orders__order_abc
+    return os.path.splitext(source)[0].replace('/', '__').replace('\\', '__')
+
+
+def _write_parts(df, source, history_dir):
+    parts = []
+    for day, rows in df.groupby(df['order_date'].dt.strftime('%Y-%m-%d')):
+        partition = os.path.join(history_dir, f"date={day}")
+        os.makedirs(partition, exist_ok=True)
+        part = os.path.join(partition, f"{_part_name(source)}.parquet")
+        rows.to_parquet(part, index=False)
+        parts.append(part)
+    return parts
+
+
+@timed('history_ingest')
+def _is_source(path):
+    name = os.path.basename(path)
+    if name.startswith('order_'):
+        return LEGACY_ORDER_NAME.fullmatch(name) is not None
+    return '.tmp.' not in name
+
+
+def ingest(history_dir=HISTORY_DIR, patterns=SOURCE_PATTERNS):
+    # Only new or changed files are read; vanished files drop their parts
+    os.makedirs(history_dir, exist_ok=True)
+    summary = {'ingested': [], 'removed': [], 'skipped': 0}
+
+    with file_lock(os.path.join(history_dir, MANIFEST_NAME)):
+        manifest = _load_manifest(history_dir)
+        sources = sorted({
+            path.replace('\\', '/')
+            for pattern in patterns
+            for path in glob.glob(pattern)
+            if _is_source(path)
+        })
+
+        for source in set(manifest) - set(sources):
+            _remove_parts(manifest.pop(source)['parts'])
+            summary['removed'].append(source)
+
+        for source in sources:
+            stat = os.stat(source)
+            signature = [stat.st_mtime_ns, stat.st_size]
+            entry = manifest.get(source)
+            if entry is not None and entry['signature'] == signature:
+                summary['skipped'] += 1
+                continue
+
+            if entry is not None:
+                _remove_parts(entry['parts'])
+            df = normalize(_read_source(source), source)
+            manifest[source] = {'signature': signature, 'parts': _write_parts(df, source, history_dir)}
+            summary['ingested'].append(source)
+
+        # Rewriting an unchanged manifest would bump history_version() and
+        # invalidate every cache keyed on it
+        if summary['ingested'] or summary['removed'] or not history_version(history_dir):
+            _save_manifest(history_dir, manifest)
+    return summary
+
+
+def history_version(history_dir=HISTORY_DIR):
+    try:
+        return os.stat(os.path.join(history_dir, MANIFEST_NAME)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def load_history(history_dir=HISTORY_DIR, columns=None):
+    if not glob.glob(os.path.join(history_dir, 'date=*', '*.parquet')):
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.read_parquet(history_dir, columns=columns)
+
+
+if __name__ == "__main__":
+    # python -m store.history compacts orders/ into the Parquet dataset
+    result = ingest()
+    print(f"Ingested {len(result['ingested'])} file(s), removed {len(result['removed'])}, "
+          f"{result['skipped']} unchanged")
+    if '-v' in sys.argv:
+        for source in result['ingested']:
+            print(f"  {source}")
@@ -0,0 +1,86 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+# Crockford base32, as used by ULID
+_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+
+_lock = threading.Lock()
+_state = {'pid': None, 'ms': -1, 'random': 0}
+
+# Shared by every worker; signs the view tokens of order confirmation links
+VIEW_KEY_PATH = 'data/view.key'
+_view_keys = {}
+
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(_ALPHABET[index])
+    return ''.join(reversed(chars))
+
+
+def new_order_id():
+    # Monotonic ULID: 48-bit millisecond timestamp + 80 random bits. IDs sort
+    # by creation time; within one millisecond the random part is incremented
+    # so IDs from one process stay strictly increasing, and the random start
+    # keeps separate processes from colliding without any coordination.
+    with _lock:
+        pid = os.getpid()
+        ms = time.time_ns() // 1_000_000
+
+        if pid != _state['pid']:
+            # Forked worker: never continue the parent's sequence
+            _state.update(pid=pid, ms=-1)
+
+        if ms > _state['ms']:
+            _state['ms'] = ms
+            _state['random'] = int.from_bytes(os.urandom(10), 'big')
+        else:
+            # Same (or a backwards-adjusted) millisecond: keep counting
+            ms = _state['ms']
+            _state['random'] += 1
+            if _state['random'] > _RANDOM_MAX:
+                _state['ms'] = ms = ms + 1
+                _state['random'] = int.from_bytes(os.urandom(10), 'big') >> 1
+
+        return _encode(ms, 10) + _encode(_state['random'], 16)
+
+
+def _view_key(path=VIEW_KEY_PATH):
+    key = _view_keys.get(path)
+    if key is None:
+        try:
+            with open(path, 'rb') as f:
+                key = f.read()
+        except FileNotFoundError:
+            # First worker to get here creates it; linking fails if another won the race
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(os.urandom(32))
+            try:
+                os.link(tmp_path, path)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp_path)
+            with open(path, 'rb') as f:
+                key = f.read()
+        _view_keys[path] = key
+    return key
+
+
+def order_view_token(order_id, path=VIEW_KEY_PATH):
+    # Order ids are sequential within a millisecond, so they can be guessed;
+    # the confirmation link also carries this token, which can't be
+    return hmac.new(_view_key(path), order_id.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def check_view_token(order_id, token, path=VIEW_KEY_PATH):
+    return bool(token) and hmac.compare_digest(order_view_token(order_id, path), token)
@@ -0,0 +1,255 @@
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from store.catalog import CATALOG_PATH
+from store.locks import file_lock
+from store.metrics import timed
+from store.thumbnails import THUMBNAIL_DIR, build_thumbnails
+
+IMAGE_DIR = 'data/images'
+CHUNK_SIZE = 1000
+
+# Supplier feeds use a few different headers for the same fields
+COLUMN_ALIASES = {
+    'id': 'id',
+    'sku': 'id',
+    'product id': 'id',
+    'name': 'name',
+    'product': 'name',
+    'product name': 'name',
+    'description': 'description',
+    'price': 'price',
+    'image': 'image',
+    'image path': 'image',
+    'sizes': 'sizes',
+    'size': 'sizes',
+    'stock': 'stock',
+}
+
+DEFAULT_SIZES = ['S', 'M', 'L', 'XL']
+
+
+def _iter_csv(path):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        for row in reader:
+            yield dict(zip(header, row))
+
+
+def _iter_xlsx(path):
+    from openpyxl import load_workbook
+
+    # read_only streams rows instead of loading the whole sheet
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell) if cell is not None else '' for cell in next(rows, ())]
+        for row in rows:
+            if any(cell is not None for cell in row):
+                yield dict(zip(header, row))
+    finally:
+        workbook.close()
+
+
+def iter_feed(path):
+    reader = _iter_xlsx if path.lower().endswith(('.xlsx', '.xlsm')) else _iter_csv
+    for raw in reader(path):
+        yield {COLUMN_ALIASES[k.strip().lower()]: v for k, v in raw.items()
+               if k and k.strip().lower() in COLUMN_ALIASES}
+
+
+def iter_chunks(rows, size=CHUNK_SIZE):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def validate(row, feed_dir):
+    # Returns a catalog product, or raises ValueError with the reason. Optional
+    # fields the row leaves empty are left out, so an update keeps the old values
+    # Spreadsheets turn ids into floats ("12.0"); anything not whole is rejected
+    # rather than truncated onto another product's id
+    try:
+        product_id = float(_text(row.get('id')))
+        if not product_id.is_integer():
+            raise ValueError
+        product_id = int(product_id)
+    except (ValueError, OverflowError):
+        raise ValueError(f"invalid id {row.get('id')!r}")
+
+    try:
+        price = float(_text(row.get('price')))
+    except ValueError:
+        raise ValueError(f"invalid price {row.get('price')!r}")
+    if not math.isfinite(price) or price <= 0:
+        raise ValueError(f"invalid price {row.get('price')!r}")
+
+    product = {'id': product_id, 'price': int(price) if price.is_integer() else price}
+
+    name = _text(row.get('name'))
+    if name:
+        product['name'] = name
+
+    description = _text(row.get('description'))
+    if description:
+        product['description'] = description
+
+    sizes = [s.strip().upper() for s in _text(row.get('sizes')).replace('|', ',').split(',') if s.strip()]
+    if sizes:
+        product['sizes'] = sizes
+
+    stock = _text(row.get('stock'))
+    if stock:
+        try:
+            product['stock'] = float(stock)
+            if not product['stock'].is_integer():
+                raise ValueError
+            product['stock'] = int(product['stock'])
+        except (ValueError, OverflowError):
+            raise ValueError(f"invalid stock {row.get('stock')!r}")
+
+    image = _text(row.get('image'))
+    if image:
+        # Image paths in the feed are relative to the feed file
+        product['image'] = image if os.path.isabs(image) else os.path.join(feed_dir, image)
+        if not os.path.exists(product['image']):
+            raise ValueError(f"image not found: {image}")
+    return product
+
+
+def new_product(product):
+    # A product that isn't in the catalog yet needs a name; the rest has defaults
+    if 'name' not in product:
+        raise ValueError("missing name")
+    return {
+        'id': product['id'],
+        'name': product['name'],
+        'description': product.get('description', ''),
+        'price': product['price'],
+        'image': product.get('image', ''),
+        'sizes': product.get('sizes', DEFAULT_SIZES),
+        **({'stock': product['stock']} if 'stock' in product else {}),
+    }
+
+
+def import_image(src, image_dir=IMAGE_DIR, thumbnail_dir=THUMBNAIL_DIR):
+    # Copy the image into the catalog's image directory under a content-addressed
+    # name and prebuild its thumbnails; runs in a worker process
+    with open(src, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    dest = os.path.join(image_dir, f"{digest[:16]}{os.path.splitext(src)[1].lower()}")
+    if not os.path.exists(dest):
+        os.makedirs(image_dir, exist_ok=True)
+        tmp_path = f"{dest}.{os.getpid()}.tmp"
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dest)
+    build_thumbnails(dest, thumbnail_dir)
+    return "./" + dest.replace(os.sep, '/')
+
+
+def _load_products(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('products', [])
+
+
+def _write_catalog(products, path):
+    # Readers only ever see the old or the new file, never a partial one
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'products': products}, f, indent=4, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+@timed('catalog_import')
+def import_feed(feed_path, catalog_path=CATALOG_PATH, update=False, dry_run=False, workers=None,
+                image_dir=IMAGE_DIR, thumbnail_dir=THUMBNAIL_DIR):
+    report = {'added': 0, 'updated': 0, 'skipped': 0, 'rejected': []}
+    feed_dir = os.path.dirname(os.path.abspath(feed_path))
+
+    # Hold the lock for the whole import so two imports can't drop each other's rows
+    with file_lock(catalog_path):
+        products = _load_products(catalog_path)
+        position = {product['id']: i for i, product in enumerate(products)}
+        seen = set()
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            line = 1
+            for chunk in iter_chunks(iter_feed(feed_path)):
+                accepted = []
+                for row in chunk:
+                    line += 1
+                    try:
+                        product = validate(row, feed_dir)
+                        # First row wins within a feed; existing ids are kept unless updating
+                        if product['id'] in seen or (product['id'] in position and not update):
+                            report['skipped'] += 1
+                            continue
+                        if product['id'] not in position:
+                            product = new_product(product)
+                    except ValueError as e:
+                        report['rejected'].append((line, str(e)))
+                        continue
+                    seen.add(product['id'])
+                    accepted.append((line, product))
+
+                # Images for the whole chunk are copied and resized in parallel
+                sources = list(dict.fromkeys(product['image'] for _, product in accepted if product.get('image')))
+                images = dict(zip(sources, pool.map(
+                    import_image, sources, [image_dir] * len(sources), [thumbnail_dir] * len(sources),
+                    chunksize=max(1, len(sources) // (4 * (workers or os.cpu_count() or 1)))
+                ))) if sources and not dry_run else {}
+
+                for _, product in accepted:
+                    if product.get('image') and not dry_run:
+                        product['image'] = images[product['image']]
+                    if product['id'] in position:
+                        # The feed only overrides the fields it sets. Live stock is owned by
+                        # the inventory, so the old seed is also kept unless the feed sets one
+                        previous = products[position[product['id']]]
+                        products[position[product['id']]] = {**previous, **product}
+                        report['updated'] += 1
+                    else:
+                        position[product['id']] = len(products)
+                        products.append(product)
+                        report['added'] += 1
+
+        if not dry_run and (report['added'] or report['updated']):
+            _write_catalog(products, catalog_path)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a CSV/XLSX supplier feed into data/products.json")
+    parser.add_argument('feed', help="CSV or XLSX file with id, name, price, sizes, description, image, stock")
+    parser.add_argument('--update', action='store_true', help="replace products whose id already exists")
+    parser.add_argument('--dry-run', action='store_true', help="validate only; don't touch images or the catalog")
+    parser.add_argument('--workers', type=int, default=None, help="image processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    report = import_feed(args.feed, update=args.update, dry_run=args.dry_run, workers=args.workers)
+    print(f"added {report['added']}, updated {report['updated']}, "
+          f"skipped {report['skipped']}, rejected {len(report['rejected'])}")
+    for line, reason in report['rejected'][:20]:
+        print(f"  line {line}: {reason}")
+    return 1 if report['rejected'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+
+from store.ids import new_order_id
+from store.locks import hold_lock
+
+INTENT_DIR = 'data/intents'
+
+# Records recovery couldn't replay, kept for a person to look at
+QUARANTINE_NAME = 'quarantine.jsonl'
+
+logger = logging.getLogger(__name__)
+
+# The log is truncated once it passes this size and no checkout is in flight
+ROTATE_BYTES = 16 * 1024 * 1024
+
+
+class IntentLog:
+    # Append-only JSON-lines log of checkouts, one file per process. A "begin"
+    # record (with the full order) is fsynced before the order is written to the
+    # ledger; "done"/"abort" follow without waiting for the disk. Concurrent
+    # checkouts share fsyncs: whoever arrives while a sync is running waits for
+    # the next one, which covers every record written in the meantime.
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        # Held for the life of the process so recovery leaves a live log alone
+        self._owner = hold_lock(path)
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._cond = threading.Condition()
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+        self._size = os.fstat(self._fd).st_size
+        self._in_flight = set()
+
+    @classmethod
+    def create(cls, intent_dir=INTENT_DIR):
+        os.makedirs(intent_dir, exist_ok=True)
+        return cls(os.path.join(intent_dir, f"{new_order_id()}.log"))
+
+    def append(self, record, durable=False):
+        data = (json.dumps(record, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+        with self._cond:
+            os.write(self._fd, data)
+            self._size += len(data)
+            self._written += 1
+            if durable:
+                self._wait_synced(self._written)
+
+    def _wait_synced(self, seq):
+        # Called with self._cond held
+        while self._synced < seq:
+            if self._syncing:
+                self._cond.wait()
+                continue
+
+            self._syncing = True
+            target = self._written
+            self._cond.release()
+            try:
+                os.fsync(self._fd)
+            finally:
+                self._cond.acquire()
+                self._syncing = False
+                self._cond.notify_all()
+            self._synced = max(self._synced, target)
+
+    def begin(self, order, reservation_id=None):
+        with self._cond:
+            self._in_flight.add(order['order_id'])
+        self.append({'op': 'begin', 'order': order, 'reservation_id': reservation_id}, durable=True)
+
+    def finish(self, order_id, op='done'):
+        self.append({'op': op, 'order_id': order_id})
+        with self._cond:
+            self._in_flight.discard(order_id)
+            # Every record so far is resolved, so nothing in the file is needed any more
+            if not self._in_flight and self._size > ROTATE_BYTES:
+                os.ftruncate(self._fd, 0)
+                self._size = 0
+
+
+def read_intents(path):
+    # Records in file order; a torn last line from a crash mid-write is dropped
+    records = []
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def unfinished(records):
+    # "begin" records without a matching "done"/"abort", in log order
+    pending = {}
+    for record in records:
+        if record.get('op') == 'begin':
+            order_id = (record.get('order') or {}).get('order_id')
+            pending[order_id if order_id is not None else id(record)] = record
+        else:
+            pending.pop(record.get('order_id'), None)
+    return list(pending.values())
+
+
+def quarantine(record, error, intent_dir=INTENT_DIR):
+    with open(os.path.join(intent_dir, QUARANTINE_NAME), 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'error': repr(error), 'record': record}, default=str) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def recover(replay, intent_dir=INTENT_DIR):
+    # Hand every unfinished checkout left by a dead process to replay(record),
+    # then delete its log. Logs still locked by a live process are skipped. A
+    # record replay() fails on is moved to the quarantine file, so it can't
+    # block (or get replayed again with) the records around it
+    results = []
+    for path in sorted(glob.glob(os.path.join(intent_dir, '*.log'))):
+        owner = hold_lock(path)
+        if owner is None:
+            continue
+        try:
+            try:
+                records = read_intents(path)
+            except FileNotFoundError:
+                continue  # recovered by another process just now
+            for record in unfinished(records):
+                order_id = (record.get('order') or {}).get('order_id')
+                try:
+                    results.append((order_id, replay(record)))
+                except Exception as e:
+                    logger.exception("Could not recover checkout %s from %s", order_id, path)
+                    quarantine(record, e, intent_dir)
+                    results.append((order_id, 'quarantined'))
+            os.remove(path)
+            os.remove(f"{path}.lock")
+        finally:
+            owner.close()
+    return results
+
+
+if __name__ == "__main__":
+    # python -m store.intents lists unfinished checkouts in every intent log
+    for path in sorted(glob.glob(os.path.join(sys.argv[1] if len(sys.argv) > 1 else INTENT_DIR, '*.log'))):
+        for record in unfinished(read_intents(path)):
+            order = record.get('order') or {}
+            print(f"{os.path.basename(path)}\t{order.get('order_id')}\t{order.get('idempotency_key', '')}")
@@ -0,0 +1,198 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from store.ids import new_order_id
+
+INVENTORY_PATH = 'data/inventory.db'
+
+# Held stock is released automatically if checkout never completes
+RESERVATION_TTL = 15 * 60
+
+# Released and long-expired holds are deleted at most this often per process
+PURGE_INTERVAL = 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stock (
+    product_id INTEGER NOT NULL,
+    size TEXT NOT NULL,
+    on_hand INTEGER NOT NULL,
+    PRIMARY KEY (product_id, size)
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    reservation_id TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    size TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'held',
+    PRIMARY KEY (reservation_id, product_id, size)
+);
+CREATE INDEX IF NOT EXISTS reservations_held
+    ON reservations(product_id, size, expires_at) WHERE status = 'held';
+"""
+
+# Stock still free to sell: on hand minus unexpired holds
+_AVAILABLE_SQL = (
+    "s.on_hand - COALESCE((SELECT SUM(r.quantity) FROM reservations r "
+    "WHERE r.product_id = s.product_id AND r.size = s.size "
+    "AND r.status = 'held' AND r.expires_at > ?), 0)"
+)
+
+_local = threading.local()
+_seeded = {}
+_last_purge = {}
+
+
+class OutOfStock(Exception):
+    def __init__(self, item, available):
+        super().__init__(f"Only {available} left of {item['name']} (Size: {item['size']})")
+        self.item = item
+        self.available = available
+
+
+def connect(path=INVENTORY_PATH):
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Autocommit mode; writes use short BEGIN IMMEDIATE transactions so the
+        # availability check and the hold are atomic across sessions and processes
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        connections[path] = conn
+    return conn
+
+
+def seed_from_catalog(catalog, path=INVENTORY_PATH):
+    # Products with a "stock" field ({"M": 10, ...} or one number for every
+    # size) are tracked; existing counts are never overwritten. Untracked
+    # products are always available.
+    if _seeded.get(path) == catalog.version:
+        return
+    rows = []
+    for product in catalog:
+        stock = product.get('stock')
+        if stock is None:
+            continue
+        for size in product.get('sizes', []):
+            quantity = stock.get(size, 0) if isinstance(stock, dict) else stock
+            rows.append((product['id'], size, int(quantity)))
+    if rows:
+        connect(path).executemany("INSERT OR IGNORE INTO stock VALUES (?, ?, ?)", rows)
+    _seeded[path] = catalog.version
+
+
+def availability(product_ids, path=INVENTORY_PATH):
+    # {(product_id, size): available} for the tracked sizes of these products
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+    placeholders = ','.join('?' * len(product_ids))
+    rows = connect(path).execute(
+        f"SELECT s.product_id, s.size, {_AVAILABLE_SQL} FROM stock s WHERE s.product_id IN ({placeholders})",
+        [time.time(), *product_ids],
+    ).fetchall()
+    return {(product_id, size): max(available, 0) for product_id, size, available in rows}
+
+
+def reserve(items, ttl=RESERVATION_TTL, path=INVENTORY_PATH):
+    # Hold stock for every order item or for none of them
+    conn = connect(path)
+    reservation_id = new_order_id()
+    now = time.time()
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for item in items:
+            product_id, size, quantity = item['id'], item['size'], item['quantity']
+            if quantity <= 0:
+                # A negative hold would add stock when committed
+                raise ValueError(f"Invalid quantity {quantity} of {item['name']} (Size: {item['size']})")
+            row = conn.execute(
+                f"SELECT {_AVAILABLE_SQL} FROM stock s WHERE s.product_id = ? AND s.size = ?",
+                (now, product_id, size),
+            ).fetchone()
+            if row is None:
+                continue  # not tracked
+            if row[0] < quantity:
+                raise OutOfStock(item, max(row[0], 0))
+            conn.execute(
+                "INSERT INTO reservations VALUES (?, ?, ?, ?, ?, 'held') "
+                "ON CONFLICT DO UPDATE SET quantity = quantity + excluded.quantity",
+                (reservation_id, product_id, size, quantity, now + ttl),
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+    if now - _last_purge.get(path, 0) > PURGE_INTERVAL:
+        _last_purge[path] = now
+        purge_expired(path=path)
+    return reservation_id
+
+
+def commit(reservation_id, path=INVENTORY_PATH):
+    # Turn a hold into a sale: decrement stock and close the reservation
+    conn = connect(path)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            "UPDATE stock SET on_hand = on_hand - ("
+            "SELECT r.quantity FROM reservations r WHERE r.reservation_id = ? "
+            "AND r.product_id = stock.product_id AND r.size = stock.size AND r.status = 'held') "
+            "WHERE EXISTS (SELECT 1 FROM reservations r WHERE r.reservation_id = ? "
+            "AND r.product_id = stock.product_id AND r.size = stock.size AND r.status = 'held')",
+            (reservation_id, reservation_id),
+        )
+        conn.execute(
+            "UPDATE reservations SET status = 'committed' WHERE reservation_id = ? AND status = 'held'",
+            (reservation_id,),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def release(reservation_id, path=INVENTORY_PATH):
+    connect(path).execute(
+        "UPDATE reservations SET status = 'released' WHERE reservation_id = ? AND status = 'held'",
+        (reservation_id,),
+    )
+
+
+def purge_expired(older_than=24 * 60 * 60, path=INVENTORY_PATH):
+    # Expired holds no longer count; drop them after a while to keep the index small
+    connect(path).execute(
+        "DELETE FROM reservations WHERE status != 'committed' AND expires_at < ?",
+        (time.time() - older_than,),
+    )
+
+
+def set_stock(product_id, size, on_hand, path=INVENTORY_PATH):
+    connect(path).execute(
+        "INSERT INTO stock VALUES (?, ?, ?) ON CONFLICT DO UPDATE SET on_hand = excluded.on_hand",
+        (product_id, size, on_hand),
+    )
+
+
+if __name__ == "__main__":
+    # python -m store.inventory set <product id> <size> <on hand>
+    # python -m store.inventory show <product id> [...]
+    if len(sys.argv) == 5 and sys.argv[1] == 'set':
+        set_stock(int(sys.argv[2]), sys.argv[3], int(sys.argv[4]))
+    elif len(sys.argv) > 2 and sys.argv[1] == 'show':
+        for (product_id, size), available in sorted(availability(int(a) for a in sys.argv[2:]).items()):
+            print(f"{product_id}\t{size}\t{available}")
+    else:
+        print("usage: python -m store.inventory set ID SIZE QTY | show ID [ID ...]")
+        sys.exit(2)
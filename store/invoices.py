@@ -0,0 +1,93 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from store.backends import get_backend
+from store.cache import shared_cache
+from store.ledger import LEDGER_PATH, invoice_bytes
+
+INVOICE_DIR = 'orders'
+
+# Shared by all sessions; invoices render off the Streamlit script thread
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='invoice')
+_pending = {}  # only invoices still rendering
+
+# Repeat views of a confirmation page are served from memory; orders and
+# invoices never change once written, so entries don't need invalidating
+_orders = shared_cache('orders', max_bytes=8 * 1024 * 1024)
+_invoices = shared_cache('invoices', max_bytes=32 * 1024 * 1024)
+# Failed renders, so the confirmation page can offer a retry
+_failures = shared_cache('invoice_failures', max_bytes=1024 * 1024, max_entries=1000)
+
+
+def find_order(order_id):
+    # Looked up by primary key in the ledger, so any worker can serve any order
+    order = _orders.get(order_id)
+    if order is None:
+        order = get_backend().get_order(order_id)
+        if order is not None:
+            _orders.put(order_id, order)
+    return order
+
+
+def invoice_path(order_id, invoice_dir=INVOICE_DIR):
+    return os.path.join(invoice_dir, f"order_{order_id}.xlsx")
+
+
+def _render(order_id, path, ledger_path):
+    data = invoice_bytes(order_id, ledger_path)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    # Write to a temporary file first so readers never see a partial workbook
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    _invoices.put(order_id, data)
+    return path
+
+
+def _finished(path, future):
+    # Runs when the render ends, so _pending only ever holds running invoices
+    if _pending.get(path) is future:
+        _pending.pop(path, None)
+    if future.cancelled() or future.exception() is not None:
+        _failures.put(path, True)
+
+
+def submit_invoice(order_id, invoice_dir=INVOICE_DIR, ledger_path=LEDGER_PATH):
+    path = invoice_path(order_id, invoice_dir)
+    _failures.pop(path)
+    future = _pending[path] = _executor.submit(_render, order_id, path, ledger_path)
+    future.add_done_callback(lambda future: _finished(path, future))
+    return path
+
+
+def invoice_data(order_id, invoice_dir=INVOICE_DIR):
+    # Invoice bytes, or None if it hasn't been rendered yet. The file is read at
+    # most once per process (e.g. when another worker rendered it)
+    data = _invoices.get(order_id)
+    if data is None:
+        path = invoice_path(order_id, invoice_dir)
+        if path in _pending and not _pending[path].done():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        _invoices.put(order_id, data)
+    return data
+
+
+def invoice_status(order_id, invoice_dir=INVOICE_DIR):
+    # 'ready', 'pending', 'failed' or 'missing' (never submitted in this process)
+    if _invoices.peek(order_id) is not None:
+        return 'ready'
+
+    path = invoice_path(order_id, invoice_dir)
+    future = _pending.get(path)
+    if future is not None and not future.done():
+        return 'pending'
+    if _failures.peek(path) is not None:
+        return 'failed'
+    return 'ready' if invoice_data(order_id, invoice_dir) is not None else 'missing'
@@ -0,0 +1,210 @@
+import os
+import sqlite3
+import threading
+from io import BytesIO
+
+from store.metrics import timed
+
+LEDGER_PATH = 'data/orders.db'
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+ORDER_COLUMNS = [
+    'Order ID', 'Date', 'Customer Name', 'Phone Number', 'Delivery Address',
+    'Product Name', 'Size', 'Quantity', 'Price', 'Subtotal', 'Total Amount'
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    customer_name TEXT NOT NULL,
+    customer_phone TEXT NOT NULL,
+    customer_address TEXT NOT NULL,
+    total_amount NUMERIC NOT NULL
+);
+CREATE TABLE IF NOT EXISTS order_items (
+    order_id TEXT NOT NULL REFERENCES orders(order_id),
+    line_no INTEGER NOT NULL,
+    product_id INTEGER,
+    product_name TEXT NOT NULL,
+    size TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    price NUMERIC NOT NULL,
+    PRIMARY KEY (order_id, line_no)
+);
+CREATE INDEX IF NOT EXISTS orders_created_at ON orders(created_at);
+CREATE TABLE IF NOT EXISTS checkout_keys (
+    idempotency_key TEXT PRIMARY KEY,
+    order_id TEXT NOT NULL REFERENCES orders(order_id)
+);
+"""
+
+# One connection per thread (each Streamlit session runs in its own thread)
+_local = threading.local()
+
+
+def connect(path=LEDGER_PATH):
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers run alongside the single writer; NORMAL sync is
+        # still durable against application crashes in WAL mode
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        connections[path] = conn
+    return conn
+
+
+@timed('ledger_append')
+def append_order(order, path=LEDGER_PATH):
+    # Commit the order header and all of its lines in one transaction. An
+    # idempotency key that was already used raises sqlite3.IntegrityError
+    conn = connect(path)
+    with conn:
+        if order.get('idempotency_key'):
+            conn.execute(
+                "INSERT INTO checkout_keys VALUES (?, ?)",
+                (order['idempotency_key'], order['order_id']),
+            )
+        conn.execute(
+            "INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                order['order_id'],
+                order['date'],
+                order['customer_name'],
+                order['customer_phone'],
+                order['customer_address'],
+                order['total_amount'],
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO order_items VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    order['order_id'],
+                    line_no,
+                    item.get('id'),
+                    item['name'],
+                    item.get('size', 'N/A'),
+                    item.get('quantity', 1),
+                    item['price'],
+                )
+                for line_no, item in enumerate(order['items'])
+            ],
+        )
+    return order
+
+
+def order_id_for_key(idempotency_key, path=LEDGER_PATH):
+    row = connect(path).execute(
+        "SELECT order_id FROM checkout_keys WHERE idempotency_key = ?", (idempotency_key,)
+    ).fetchone()
+    return row['order_id'] if row else None
+
+
+def get_order(order_id, path=LEDGER_PATH):
+    conn = connect(path)
+    row = conn.execute("SELECT * FROM orders WHERE order_id = ?", (order_id,)).fetchone()
+    if row is None:
+        return None
+
+    items = conn.execute(
+        "SELECT product_id, product_name, size, quantity, price FROM order_items "
+        "WHERE order_id = ? ORDER BY line_no",
+        (order_id,),
+    ).fetchall()
+    return {
+        'order_id': row['order_id'],
+        'date': row['created_at'],
+        'customer_name': row['customer_name'],
+        'customer_phone': row['customer_phone'],
+        'customer_address': row['customer_address'],
+        'total_amount': row['total_amount'],
+        'items': [
+            {
+                'id': item['product_id'],
+                'name': item['product_name'],
+                'size': item['size'],
+                'quantity': item['quantity'],
+                'price': item['price'],
+            }
+            for item in items
+        ],
+    }
+
+
+def ledger_version(path=LEDGER_PATH):
+    # The ledger is append-only, so the newest line's rowid identifies its contents
+    row = connect(path).execute("SELECT max(rowid) FROM order_items").fetchone()
+    return row[0] or 0
+
+
+def iter_order_rows(version=None, chunk_size=10000, path=LEDGER_PATH):
+    # Yield lists of ORDER_COLUMNS tuples without loading the whole ledger
+    if version is None:
+        version = ledger_version(path)
+
+    cursor = connect(path).execute(
+        "SELECT o.order_id, o.created_at, o.customer_name, o.customer_phone, o.customer_address, "
+        "i.product_name, i.size, i.quantity, i.price, i.quantity * i.price, o.total_amount "
+        "FROM order_items i JOIN orders o ON o.order_id = i.order_id "
+        "WHERE i.rowid <= ? ORDER BY o.created_at, o.order_id, i.line_no",
+        (version,),
+    )
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield [tuple(row) for row in rows]
+
+
+def invoice_rows(order):
+    rows = []
+    for item in order['items']:
+        rows.append({
+            'Order ID': order['order_id'],
+            'Date': order['date'],
+            'Customer Name': order['customer_name'],
+            'Phone Number': order['customer_phone'],
+            'Delivery Address': order['customer_address'],
+            'Product Name': item['name'],
+            'Size': item.get('size', 'N/A'),
+            'Quantity': item.get('quantity', 1),
+            'Price': item['price'],
+            'Subtotal': item['price'] * item.get('quantity', 1),
+            'Total Amount': order['total_amount']
+        })
+    return rows
+
+
+def render_invoice(order):
+    # A 1-10 row invoice doesn't need a DataFrame: stream the rows straight
+    # into a write-only workbook
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Sheet1')
+    sheet.append(ORDER_COLUMNS)
+    for row in invoice_rows(order):
+        sheet.append([row[column] for column in ORDER_COLUMNS])
+
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+@timed('invoice_render')
+def invoice_bytes(order_id, path=LEDGER_PATH):
+    # Build the Excel invoice on demand from the ledger
+    order = get_order(order_id, path)
+    if order is None:
+        raise KeyError(f"Unknown order: {order_id}")
+    return render_invoice(order)
@@ -0,0 +1,49 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock(lock_file, blocking=True):
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+
+
+def _unlock(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path):
+    # Exclusive advisory lock on a sidecar ".lock" file, shared across processes
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(f"{path}.lock", 'a+') as lock_file:
+        _lock(lock_file)
+        try:
+            yield
+        finally:
+            _unlock(lock_file)
+
+
+def hold_lock(path):
+    # Take the sidecar lock without waiting and keep it until the returned file
+    # is closed (or the process exits). Returns None if another process has it
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    lock_file = open(f"{path}.lock", 'a+')
+    try:
+        _lock(lock_file, blocking=False)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
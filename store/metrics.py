@@ -0,0 +1,216 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from functools import wraps
+
+from store.cache import cache_stats
+
+METRICS_FILE_ENV = 'STORE_METRICS_FILE'
+PROFILE_DIR = 'data/profiles'
+
+# Prometheus-style latency buckets (seconds)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class Histogram:
+    __slots__ = ('name', 'labels', 'counts', 'count', 'sum', 'max', '_lock')
+
+    def __init__(self, name, labels=()):
+        self.name = name
+        self.labels = labels
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    self.counts[i] += 1
+                    break
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        with self._lock:
+            target = q * self.count
+            seen = 0
+            for bound, count in zip(BUCKETS, self.counts):
+                seen += count
+                if count and seen >= target:
+                    return min(bound, self.max)
+            return self.max
+
+
+# Process-wide registry shared by all sessions
+_histograms = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    hist = _histograms.get(key)
+    if hist is None:
+        with _registry_lock:
+            hist = _histograms.setdefault(key, Histogram(name, key[1]))
+    return hist
+
+
+class timed:
+    # Usable as `with timed('name'):` or as a `@timed('name')` decorator
+
+    def __init__(self, name, **labels):
+        self.histogram = histogram(name, **labels)
+        self._local = threading.local()
+
+    def __enter__(self):
+        self._local.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._local.start)
+        return False
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def snapshot():
+    with _registry_lock:
+        histograms = list(_histograms.values())
+    return [
+        {
+            'name': hist.name,
+            'labels': dict(hist.labels),
+            'count': hist.count,
+            'mean_ms': hist.sum / hist.count * 1000 if hist.count else 0.0,
+            'p50_ms': hist.quantile(0.5) * 1000,
+            'p95_ms': hist.quantile(0.95) * 1000,
+            'max_ms': hist.max * 1000,
+        }
+        for hist in sorted(histograms, key=lambda h: (h.name, h.labels))
+        if hist.count
+    ]
+
+
+def _format_labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in items) + '}'
+
+
+def prometheus_text():
+    with _registry_lock:
+        histograms = sorted(_histograms.values(), key=lambda h: (h.name, h.labels))
+
+    lines = []
+    for name in sorted({hist.name for hist in histograms}):
+        metric = f"store_{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for hist in (h for h in histograms if h.name == name):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, hist.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{metric}_bucket{_format_labels(hist.labels, le=le)} {cumulative}")
+            lines.append(f"{metric}_sum{_format_labels(hist.labels)} {hist.sum:.6f}")
+            lines.append(f"{metric}_count{_format_labels(hist.labels)} {hist.count}")
+
+    caches = cache_stats()
+    for metric, field, kind in (
+        ('store_cache_bytes', 'bytes', 'gauge'),
+        ('store_cache_entries', 'entries', 'gauge'),
+        ('store_cache_hits_total', 'hits', 'counter'),
+        ('store_cache_misses_total', 'misses', 'counter'),
+        ('store_cache_evictions_total', 'evictions', 'counter'),
+    ):
+        if caches:
+            lines.append(f"# TYPE {metric} {kind}")
+        for row in caches:
+            lines.append(f"{metric}{_format_labels((), cache=row['name'])} {row[field]}")
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path=None):
+    # Textfile-collector friendly: written atomically
+    path = path or os.environ.get(METRICS_FILE_ENV, 'data/metrics.prom')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+    return path
+
+
+def _flush_forever(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            write_prometheus(path)
+        except OSError:
+            pass
+
+
+if os.environ.get(METRICS_FILE_ENV):
+    threading.Thread(
+        target=_flush_forever, args=(os.environ[METRICS_FILE_ENV], 15), daemon=True, name='metrics-flush'
+    ).start()
+
+
+# cProfile capture of a single page run, armed from the admin page
+_profile = {'armed': False, 'last': None}
+_profile_lock = threading.Lock()
+
+
+def arm_profiler():
+    _profile['armed'] = True
+
+
+def last_profile():
+    return _profile['last']
+
+
+class page_run:
+    # Times a whole page run; profiles it when the profiler has been armed
+
+    def __init__(self, page):
+        self.page = page
+        self.timer = timed('page_run', page=page)
+        self.profiler = None
+
+    def __enter__(self):
+        with _profile_lock:
+            if _profile['armed']:
+                _profile['armed'] = False
+                self.profiler = cProfile.Profile()
+        self.timer.__enter__()
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.timer.__exit__(*exc)
+
+        if self.profiler is not None:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{self.page}_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+            self.profiler.dump_stats(path)
+            report = io.StringIO()
+            pstats.Stats(self.profiler, stream=report).sort_stats('cumulative').print_stats(30)
+            _profile['last'] = {'page': self.page, 'path': path, 'report': report.getvalue()}
+        return False
@@ -0,0 +1,126 @@
+import csv
+import glob
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from store.locks import file_lock
+
+ROLLUP_DIR = 'orders'
+
+COLUMNS = [
+    'Order Date', 'Customer Name', 'Phone', 'Address',
+    'Product', 'Size', 'Quantity', 'Price', 'Total'
+]
+
+# Read back as text so e.g. phone numbers keep their leading zero
+TEXT_DTYPES = {column: str for column in ('Order Date', 'Customer Name', 'Phone', 'Address', 'Product', 'Size')}
+
+logger = logging.getLogger(__name__)
+
+# Background thread that compacts finished days, one per process
+_compactor = {'pid': None}
+_compactor_lock = threading.Lock()
+
+
+def rollup_paths(day, rollup_dir=ROLLUP_DIR):
+    # Rows are appended to a CSV during the day and compacted into the .xlsx
+    base = os.path.join(rollup_dir, f"orders_{day}")
+    return f"{base}.csv", f"{base}.xlsx"
+
+
+def append_order_rows(order, rollup_dir=ROLLUP_DIR):
+    order_date = datetime.now()
+    day = order_date.strftime('%Y%m%d')
+    csv_path, _ = rollup_paths(day, rollup_dir)
+
+    rows = [
+        [
+            order_date.strftime("%Y-%m-%d %H:%M:%S"),
+            order['customer_name'],
+            order['customer_phone'],
+            order['customer_address'],
+            item['name'],
+            item.get('size', 'N/A'),
+            item.get('quantity', 1),
+            item['price'],
+            item['price'] * item.get('quantity', 1)
+        ]
+        for item in order['items']
+    ]
+
+    # Constant-time append; the lock serializes writers across sessions and processes
+    os.makedirs(rollup_dir, exist_ok=True)
+    with file_lock(csv_path):
+        with open(csv_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if f.tell() == 0:
+                writer.writerow(COLUMNS)
+            writer.writerows(rows)
+
+    return csv_path
+
+
+def compact_day(day, rollup_dir=ROLLUP_DIR):
+    # Merge the day's appended rows into orders_YYYYMMDD.xlsx
+    import pandas as pd
+
+    csv_path, xlsx_path = rollup_paths(day, rollup_dir)
+    with file_lock(csv_path):
+        if not os.path.exists(csv_path):
+            return xlsx_path if os.path.exists(xlsx_path) else None
+
+        df = pd.read_csv(csv_path, dtype=TEXT_DTYPES, keep_default_na=False)
+        if os.path.exists(xlsx_path):
+            existing = pd.read_excel(xlsx_path, dtype=TEXT_DTYPES, keep_default_na=False)
+            df = pd.concat([existing, df], ignore_index=True)
+
+        tmp_path = f"{os.path.splitext(xlsx_path)[0]}.tmp.xlsx"
+        df.to_excel(tmp_path, index=False, engine='openpyxl')
+        os.replace(tmp_path, xlsx_path)
+        os.remove(csv_path)
+    return xlsx_path
+
+
+def compact_pending(before=None, rollup_dir=ROLLUP_DIR):
+    # Compact every pending rollup older than `before` (all of them if None)
+    compacted = []
+    for csv_path in sorted(glob.glob(os.path.join(rollup_dir, 'orders_*.csv'))):
+        day = os.path.basename(csv_path)[len('orders_'):-len('.csv')]
+        if before is None or day < before:
+            compacted.append(compact_day(day, rollup_dir))
+    return compacted
+
+
+def _compact_daily(rollup_dir):
+    # Closes out the previous days now and then again just after every midnight
+    while True:
+        try:
+            compact_pending(before=datetime.now().strftime('%Y%m%d'), rollup_dir=rollup_dir)
+        except Exception:
+            logger.exception("Could not compact the order rollups in %s", rollup_dir)
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        time.sleep((midnight - now).total_seconds() + 60)
+
+
+def start_compactor(rollup_dir=ROLLUP_DIR):
+    # Compaction imports pandas and rewrites a workbook, so it runs on its own
+    # thread instead of inside a shopper's checkout. Idempotent per process
+    with _compactor_lock:
+        if _compactor['pid'] != os.getpid():
+            _compactor['pid'] = os.getpid()
+            threading.Thread(target=_compact_daily, args=(rollup_dir,), name='rollup-compactor', daemon=True).start()
+
+
+if __name__ == "__main__":
+    # python -m store.rollup [YYYYMMDD ...]
+    if len(sys.argv) > 1:
+        for day in sys.argv[1:]:
+            print(compact_day(day))
+    else:
+        for path in compact_pending():
+            print(path)
@@ -0,0 +1,188 @@
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Prefixes up to this length get their postings precomputed; they match the
+# most words, so expanding them at query time is what's slow
+PREFIX_LENGTH = 3
+
+# Result bits counted per step when skipping to the start of a page
+_SKIP_CHUNK = 1024
+
+# Indexes are shared by all sessions and rebuilt when the catalog version changes
+_indexes = {}
+_lock = threading.Lock()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class SearchResults:
+    # Matching products as a bitset over price-ordered positions; only the
+    # slice that is actually displayed gets materialized
+
+    def __init__(self, index, mask):
+        self._index = index
+        self._mask = mask
+        self._bits = None
+
+    def __len__(self):
+        return self._mask.bit_count()
+
+    def __iter__(self):
+        return iter(self[0:len(self)])
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("SearchResults only supports slicing")
+        start, stop, _ = key.indices(len(self))
+
+        if self._bits is None:
+            # Least significant bit first, so string offsets are positions
+            self._bits = bin(self._mask)[:1:-1]
+
+        # Skip whole chunks of matches with str.count, then step bit by bit
+        # within the chunk the slice starts in
+        bits = self._bits
+        offset = 0
+        skip = start
+        while offset < len(bits):
+            count = bits.count('1', offset, offset + _SKIP_CHUNK)
+            if count > skip:
+                break
+            skip -= count
+            offset += _SKIP_CHUNK
+
+        products = self._index.products
+        matches = []
+        position = bits.find('1', offset)
+        for _ in range(skip):
+            position = bits.find('1', position + 1)
+        while position != -1 and len(matches) < stop - start:
+            matches.append(products[position])
+            position = bits.find('1', position + 1)
+        return matches
+
+
+class SearchIndex:
+    def __init__(self, products):
+        # Positions follow ascending price, so a price range is a contiguous bit range
+        self.products = sorted(products, key=lambda product: product['price'])
+        self.prices = [product['price'] for product in self.products]
+        # Imported catalogs mix ints and floats; the bounds share one type so
+        # they can be used together, e.g. as st.slider's range
+        self.price_type = int if all(float(price).is_integer() for price in self.prices) else float
+        self.all = (1 << len(self.products)) - 1
+
+        postings = {}
+        size_postings = {}
+        for position, product in enumerate(self.products):
+            text = f"{product['name']} {product.get('description', '')}"
+            for token in set(tokenize(text)):
+                postings.setdefault(token, array('I')).append(position)
+            for size in product.get('sizes', []):
+                size_postings.setdefault(size, array('I')).append(position)
+
+        # Common tokens are stored as bitsets, rare ones as position lists
+        # (whichever is smaller), and converted to a bitset at query time
+        self.dense_threshold = max(1, len(self.products) // 32)
+        self.tokens = {token: self._compact(positions) for token, positions in postings.items()}
+        self.vocabulary = sorted(self.tokens)
+
+        # Short prefixes, stored the same way; each token's postings count
+        # once per prefix length, so this stays proportional to the index
+        prefix_postings = {}
+        for token, positions in postings.items():
+            for length in range(1, min(len(token), PREFIX_LENGTH) + 1):
+                prefix_postings.setdefault(token[:length], []).append(positions)
+        self.prefixes = {}
+        for prefix, position_lists in prefix_postings.items():
+            if len(position_lists) == 1:
+                self.prefixes[prefix] = self.tokens[prefix] if prefix in self.tokens else self._compact(position_lists[0])
+            elif sum(map(len, position_lists)) >= self.dense_threshold:
+                self.prefixes[prefix] = self._to_mask(*position_lists)
+            else:
+                self.prefixes[prefix] = array('I', sorted({p for positions in position_lists for p in positions}))
+        self.sizes = {size: self._to_mask(positions) for size, positions in size_postings.items()}
+
+    def _compact(self, positions):
+        return self._to_mask(positions) if len(positions) >= self.dense_threshold else positions
+
+    def _to_mask(self, *position_lists):
+        bits = bytearray((len(self.products) + 7) // 8)
+        for positions in position_lists:
+            for position in positions:
+                bits[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(bits, 'little')
+
+    @property
+    def min_price(self):
+        return self.price_type(self.prices[0] if self.prices else 0)
+
+    @property
+    def max_price(self):
+        return self.price_type(self.prices[-1] if self.prices else 0)
+
+    def _token_mask(self, token):
+        # Prefix match, so partially typed words already find products
+        if len(token) <= PREFIX_LENGTH:
+            postings = self.prefixes.get(token, 0)
+            return postings if isinstance(postings, int) else self._to_mask(postings)
+
+        mask = 0
+        sparse = []
+        vocabulary = self.vocabulary
+        for i in range(bisect_left(vocabulary, token), len(vocabulary)):
+            word = vocabulary[i]
+            if not word.startswith(token):
+                break
+            postings = self.tokens[word]
+            if isinstance(postings, int):
+                mask |= postings
+            else:
+                sparse.append(postings)
+
+        if sparse:
+            mask |= self._to_mask(*sparse)
+        return mask
+
+    def _price_mask(self, min_price, max_price):
+        low = 0 if min_price is None else bisect_left(self.prices, min_price)
+        high = len(self.prices) if max_price is None else bisect_right(self.prices, max_price)
+        if high <= low:
+            return 0
+        return ((1 << high) - 1) ^ ((1 << low) - 1)
+
+    def search(self, query='', sizes=None, min_price=None, max_price=None):
+        mask = self.all
+        for token in tokenize(query):
+            mask &= self._token_mask(token)
+            if not mask:
+                break
+
+        if sizes:
+            size_mask = 0
+            for size in sizes:
+                size_mask |= self.sizes.get(size, 0)
+            mask &= size_mask
+
+        if min_price is not None or max_price is not None:
+            mask &= self._price_mask(min_price, max_price)
+
+        return SearchResults(self, mask)
+
+
+def get_index(catalog):
+    index = _indexes.get(catalog.version)
+    if index is None:
+        with _lock:
+            index = _indexes.get(catalog.version)
+            if index is None:
+                index = SearchIndex(catalog.products)
+                _indexes.clear()
+                _indexes[catalog.version] = index
+    return index
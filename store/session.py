@@ -0,0 +1,64 @@
+import hashlib
+import json
+import secrets
+
+import streamlit as st
+
+from store.backends import get_backend
+from store.cart import Cart
+
+
+def sync_cart():
+    # Keeps st.session_state.cart in step with the shared state backend. The
+    # cart id travels in the ?cart= query param, so a reload that lands on a
+    # different worker process finds the same cart.
+    backend = get_backend()
+
+    cart_id = st.session_state.get('cart_id') or st.query_params.get('cart') or secrets.token_urlsafe(12)
+    st.session_state.cart_id = cart_id
+    if st.query_params.get('cart') != cart_id:
+        st.query_params['cart'] = cart_id
+
+    cart = st.session_state.get('cart')
+    if cart is not None and cart.version != st.session_state.get('cart_synced_version'):
+        # Changed in this session since the last sync: this session wins
+        backend.save_cart(cart_id, cart)
+    else:
+        # An empty cart is falsy, so compare with None rather than using `or`
+        loaded = backend.load_cart(cart_id)
+        if loaded is not None:
+            cart = loaded
+        elif cart is None:
+            cart = Cart()
+        st.session_state.cart = cart
+
+    st.session_state.cart_synced_version = cart.version
+    return cart
+
+
+def clear_cart():
+    # After checkout. The ordered cart is deleted from the backend right away
+    # (the switch to the confirmation page stops the script before the next
+    # sync_cart()); a reload then starts from this empty cart or a new one
+    cart = st.session_state.cart
+    cart.clear()
+    get_backend().delete_cart(st.session_state.cart_id)
+    st.session_state.cart_synced_version = cart.version
+
+
+def checkout_key(customer_name, customer_phone, customer_address):
+    # Same checkout attempt -> same key, so a repeated Place Order (double
+    # click, retry after a crash) can't create a second order. The cart id is
+    # in the URL and may be shared, so the key starts with an id only this
+    # browser session has; it also covers the cart's lines and the customer,
+    # so editing either and retrying places a new order. Clearing the cart
+    # after checkout gives it a new nonce and the next order a new key
+    if 'checkout_session' not in st.session_state:
+        st.session_state.checkout_session = secrets.token_urlsafe(12)
+    cart = st.session_state.cart
+    attempt = json.dumps([
+        [[line.id, line.size, line.quantity, line.price] for line in cart],
+        [customer_name, customer_phone, customer_address],
+    ], default=str)
+    digest = hashlib.sha256(attempt.encode('utf-8')).hexdigest()[:16]
+    return f"{st.session_state.checkout_session}:{cart.nonce}:{digest}"
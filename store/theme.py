@@ -0,0 +1,46 @@
+import hashlib
+import os
+import re
+import threading
+
+import streamlit as st
+
+ASSET_DIR = 'assets'
+
+# name -> (mtime, markup); shared by every session in the process
+_stylesheets = {}
+_lock = threading.Lock()
+
+_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+_SPACE_RE = re.compile(r'\s+')
+_PUNCTUATION_RE = re.compile(r'\s*([{};:,>])\s*')
+
+
+def minify(css):
+    css = _COMMENT_RE.sub('', css)
+    css = _SPACE_RE.sub(' ', css)
+    return _PUNCTUATION_RE.sub(r'\1', css).replace(';}', '}').strip()
+
+
+def stylesheet(name, asset_dir=ASSET_DIR):
+    # Minified <style> block for assets/<name>.css, rebuilt only when the file changes
+    path = os.path.join(asset_dir, f"{name}.css")
+    mtime = os.stat(path).st_mtime_ns
+    cached = _stylesheets.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with _lock:
+        with open(path, 'r', encoding='utf-8') as f:
+            css = minify(f.read())
+        digest = hashlib.sha1(css.encode('utf-8')).hexdigest()[:12]
+        markup = f"<style data-theme=\"{name}-{digest}\">{css}</style>"
+        _stylesheets[path] = (mtime, markup)
+    return markup
+
+
+def apply_theme(name):
+    # The markup is byte-identical on every rerun, so Streamlit's message cache
+    # (see global.minCachedMessageSize in .streamlit/config.toml) lets the
+    # browser reuse it and reruns only send its hash
+    st.markdown(stylesheet(name), unsafe_allow_html=True)
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import sys
+
+from PIL import Image, features
+
+from store.cache import shared_cache
+from store.metrics import timed
+
+THUMBNAIL_DIR = 'data/images/thumbs'
+WIDTHS = (150, 200, 400)
+GRID_WIDTH = 200
+
+# WebP keeps transparency and is much smaller; fall back to JPEG without it
+if features.check('webp'):
+    FORMAT, EXTENSION, SAVE_OPTIONS = 'WEBP', 'webp', {'quality': 80, 'method': 4}
+else:
+    FORMAT, EXTENSION, SAVE_OPTIONS = 'JPEG', 'jpg', {'quality': 85, 'optimize': True}
+
+# (path, mtime, size) -> content hash, so reruns don't re-hash the source
+_hashes = shared_cache('thumbnail_hashes', max_bytes=4 * 1024 * 1024)
+# Rendition path -> encoded bytes, so the product grid doesn't re-read files
+_renditions = shared_cache('thumbnails', max_bytes=64 * 1024 * 1024)
+
+
+def source_hash(src):
+    stat = os.stat(src)
+    key = (src, stat.st_mtime_ns, stat.st_size)
+    digest = _hashes.get(key)
+    if digest is None:
+        with open(src, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        _hashes.put(key, digest)
+    return digest
+
+
+def _rendition_path(digest, width, thumbnail_dir):
+    return os.path.join(thumbnail_dir, f"{digest[:16]}_{width}.{EXTENSION}")
+
+
+@timed('thumbnail_render')
+def _render(src, width, path):
+    with Image.open(src) as image:
+        # Never upscale; thumbnail() keeps the aspect ratio
+        image.thumbnail((width, width * 4))
+        if FORMAT == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        image.save(tmp_path, FORMAT, **SAVE_OPTIONS)
+    os.replace(tmp_path, path)
+
+
+@timed('thumbnail')
+def thumbnail(src, width=GRID_WIDTH, thumbnail_dir=THUMBNAIL_DIR):
+    # Smallest prebuilt rendition that is at least `width` pixels wide
+    width = next((w for w in WIDTHS if w >= width), WIDTHS[-1])
+    path = _rendition_path(source_hash(src), width, thumbnail_dir)
+    if not os.path.exists(path):
+        _render(src, width, path)
+    return path
+
+
+def thumbnail_data(src, width=GRID_WIDTH, thumbnail_dir=THUMBNAIL_DIR):
+    # Renditions are content-addressed, so cached bytes never go stale
+    path = thumbnail(src, width, thumbnail_dir)
+    data = _renditions.get(path)
+    if data is None:
+        with open(path, 'rb') as f:
+            data = _renditions.put(path, f.read())
+    return data
+
+
+def build_thumbnails(src, thumbnail_dir=THUMBNAIL_DIR):
+    return [thumbnail(src, width, thumbnail_dir) for width in WIDTHS]
+
+
+def warm_up(thumbnail_dir=THUMBNAIL_DIR):
+    from store.catalog import load_catalog
+
+    built = []
+    for product in load_catalog():
+        image_path = product.get('image')
+        if image_path and os.path.exists(image_path):
+            built.extend(build_thumbnails(image_path, thumbnail_dir))
+    return built
+
+
+if __name__ == "__main__":
+    # python -m store.thumbnails [image ...] prebuilds renditions (all catalog images by default)
+    paths = sys.argv[1:]
+    built = [p for src in paths for p in build_thumbnails(src)] if paths else warm_up()
+    for path in built:
+        print(path)